@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Iterable
+
+from app.domain import parse_date
+
+PARTITION_MONTH = "month"
+PARTITION_WEEK = "week"
+ARCHIVED_TABLES = {"reservations": "reservation_id", "absences": "absence_id"}
+
+
+def partition_key(value: date, scheme: str) -> str:
+    if scheme == PARTITION_WEEK:
+        year, week, _ = value.isocalendar()
+        return f"{year}-W{week:02d}"
+    return f"{value.year}-{value.month:02d}"
+
+
+def partition_start(value: date, scheme: str) -> date:
+    if scheme == PARTITION_WEEK:
+        return value - timedelta(days=value.weekday())
+    return value.replace(day=1)
+
+
+# Closed partitions of the date-keyed tables, one gzip-compressed JSON-lines
+# file per table and partition. Appending is idempotent (rows merge by primary
+# key), so a crash between archiving and trimming the live store only leaves
+# duplicates that readers collapse.
+class ReservationArchive:
+    def __init__(self, root: Path, scheme: str = PARTITION_MONTH) -> None:
+        if scheme not in {PARTITION_MONTH, PARTITION_WEEK}:
+            raise ValueError(f"Unsupported archive partition: {scheme}")
+        self.root = root
+        self.scheme = scheme
+        self._lock = threading.Lock()
+
+    def append(self, table: str, rows: Iterable[dict[str, Any]]) -> int:
+        key_field = ARCHIVED_TABLES[table]
+        grouped: dict[str, list[dict[str, Any]]] = {}
+        for row in rows:
+            grouped.setdefault(partition_key(parse_date(row["date"]), self.scheme), []).append(row)
+        if not grouped:
+            return 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            for partition, new_rows in grouped.items():
+                path = self._path(table, partition)
+                merged = {row[key_field]: row for row in self._read(path)}
+                merged.update((row[key_field], row) for row in new_rows)
+                self._write(path, sorted(merged.values(), key=lambda row: (parse_date(row["date"]), row["slot"])))
+        return sum(len(new_rows) for new_rows in grouped.values())
+
+    def query(self, table: str, start: date | None = None, end: date | None = None) -> list[dict[str, Any]]:
+        low = partition_key(start, self.scheme) if start else None
+        high = partition_key(end, self.scheme) if end else None
+        rows: list[dict[str, Any]] = []
+        for partition in self.partitions(table):
+            if (low and partition < low) or (high and partition > high):
+                continue
+            for row in self._read(self._path(table, partition)):
+                value_date = parse_date(row["date"])
+                if (start and value_date < start) or (end and value_date > end):
+                    continue
+                rows.append(row)
+        return rows
+
+    def partitions(self, table: str) -> list[str]:
+        prefix = f"{table}-"
+        return sorted(
+            path.name[len(prefix) : -len(".jsonl.gz")]
+            for path in self.root.glob(f"{table}-*.jsonl.gz")
+        )
+
+    def _path(self, table: str, partition: str) -> Path:
+        return self.root / f"{table}-{partition}.jsonl.gz"
+
+    def _read(self, path: Path) -> list[dict[str, Any]]:
+        if not path.exists():
+            return []
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+
+    def _write(self, path: Path, rows: list[dict[str, Any]]) -> None:
+        with NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as tmp:
+            temp_path = Path(tmp.name)
+        try:
+            with gzip.open(temp_path, "wt", encoding="utf-8") as handle:
+                for row in rows:
+                    handle.write(json.dumps(dict(row), default=_json_default, separators=(",", ":")) + "\n")
+            temp_path.replace(path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Unsupported archive value: {value!r}")
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+from filelock import FileLock
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class BackupEntry:
+    backup_id: str
+    created_at: str
+    sha256: str
+    size: int
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    keep_all: timedelta
+    hourly: timedelta
+    daily: timedelta
+
+    @classmethod
+    def from_settings(cls) -> RetentionPolicy:
+        return cls(
+            keep_all=timedelta(minutes=settings.backup_keep_all_minutes),
+            hourly=timedelta(hours=settings.backup_hourly_hours),
+            daily=timedelta(days=settings.backup_daily_days),
+        )
+
+    def select(self, entries: list[BackupEntry], now: datetime) -> list[BackupEntry]:
+        kept: list[BackupEntry] = []
+        buckets: set[str] = set()
+        ordered = sorted(entries, key=lambda item: item.created_at, reverse=True)
+        for index, entry in enumerate(ordered):
+            created = datetime.fromisoformat(entry.created_at)
+            age = now - created
+            if index == 0 or age <= self.keep_all:
+                kept.append(entry)
+                continue
+            if age <= self.hourly:
+                bucket = created.strftime("h%Y%m%d%H")
+            elif age <= self.daily:
+                bucket = created.strftime("d%Y%m%d")
+            else:
+                continue
+            if bucket not in buckets:
+                buckets.add(bucket)
+                kept.append(entry)
+        return kept
+
+
+# Content-addressed, gzip-compressed workbook backups. Writers hard-link the
+# outgoing workbook into ``staging``; a worker thread hashes, compresses,
+# indexes and prunes off the request path.
+class BackupStore:
+    def __init__(self, root: Path, policy: RetentionPolicy | None = None) -> None:
+        self.root = root
+        self.policy = policy or RetentionPolicy.from_settings()
+        self.prune_interval_seconds = 60.0
+        self._queue: queue.Queue[Path] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._last_prune = 0.0
+
+    @property
+    def staging_dir(self) -> Path:
+        return self.root / "staging"
+
+    @property
+    def objects_dir(self) -> Path:
+        return self.root / "objects"
+
+    @property
+    def index_file(self) -> Path:
+        return self.root / "index.json"
+
+    def stage(self, source: Path) -> None:
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+        staged = self.staging_dir / f"{stamp}-{uuid.uuid4().hex[:8]}.xlsx"
+        try:
+            os.link(source, staged)
+        except OSError:
+            shutil.copy2(source, staged)
+        self._start()
+        self._queue.put(staged)
+
+    def flush(self) -> None:
+        self._start()
+        self._queue.join()
+
+    def list_backups(self) -> list[BackupEntry]:
+        return sorted(self._read_index(), key=lambda item: item.created_at, reverse=True)
+
+    def materialize(self, backup_id: str, target: Path) -> Path:
+        entry = next((item for item in self._read_index() if item.backup_id == backup_id), None)
+        if entry is None:
+            raise KeyError(backup_id)
+        with gzip.open(self._object_path(entry.sha256), "rb") as src, target.open("wb") as dst:
+            shutil.copyfileobj(src, dst)
+        return target
+
+    def ingest(self, staged: Path) -> BackupEntry:
+        digest = hashlib.sha256()
+        with staged.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        stat = staged.stat()
+        entry = BackupEntry(
+            backup_id=staged.stem,
+            created_at=datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+            sha256=sha256,
+            size=stat.st_size,
+        )
+        # Held across the object write so a concurrent prune cannot drop it.
+        with self._index_lock():
+            target = self._object_path(sha256)
+            if not target.exists():
+                self._write_object(staged, target)
+            entries = self._read_index()
+            entries.append(entry)
+            self._write_index(entries)
+        staged.unlink(missing_ok=True)
+        return entry
+
+    def prune(self, now: datetime | None = None) -> int:
+        with self._index_lock():
+            entries = self._read_index()
+            kept = self.policy.select(entries, now or datetime.utcnow())
+            self._write_index(kept)
+            live = {entry.sha256 for entry in kept}
+            # Still under the lock: an ingest in another process may be about
+            # to reference one of these objects by hash.
+            if self.objects_dir.exists():
+                for path in self.objects_dir.glob("*.xlsx.gz"):
+                    if path.name.removesuffix(".xlsx.gz") not in live:
+                        path.unlink(missing_ok=True)
+        return len(entries) - len(kept)
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            # Pick up anything a previous process staged but never ingested.
+            if self.staging_dir.exists():
+                for leftover in sorted(self.staging_dir.glob("*.xlsx")):
+                    self._queue.put(leftover)
+            self._thread = threading.Thread(target=self._run, name="backup-worker", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            staged = self._queue.get()
+            try:
+                if staged.exists():
+                    self.ingest(staged)
+                if time.monotonic() - self._last_prune >= self.prune_interval_seconds:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+            except Exception as exc:  # a failed backup must never break the worker
+                print(f"[WARN] Backup of {staged} failed: {exc}")
+            finally:
+                self._queue.task_done()
+
+    def _write_object(self, staged: Path, target: Path) -> None:
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(dir=self.objects_dir, suffix=".tmp", delete=False) as tmp:
+            temp_path = Path(tmp.name)
+        try:
+            with staged.open("rb") as src, gzip.open(temp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            temp_path.replace(target)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.objects_dir / f"{sha256}.xlsx.gz"
+
+    def _index_lock(self) -> FileLock:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return FileLock(str(self.root / "index.lock"))
+
+    def _read_index(self) -> list[BackupEntry]:
+        try:
+            payload = json.loads(self.index_file.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return []
+        return [BackupEntry(**item) for item in payload]
+
+    def _write_index(self, entries: list[BackupEntry]) -> None:
+        with NamedTemporaryFile("w", dir=self.root, suffix=".tmp", delete=False, encoding="utf-8") as tmp:
+            json.dump([asdict(entry) for entry in entries], tmp)
+            temp_path = Path(tmp.name)
+        temp_path.replace(self.index_file)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from app.config import settings
+from app.excel_bridge import export_workbook, import_workbook
+from app.storage import create_repository
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Desk reservation storage tools")
+    parser.add_argument("--backend", default=None, help="Storage backend (defaults to DESK_APP_BACKEND)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="Export storage to an xlsx workbook")
+    export_cmd.add_argument("path", nargs="?", type=Path, default=settings.export_file)
+
+    import_cmd = commands.add_parser("import", help="Replace storage contents from an xlsx workbook")
+    import_cmd.add_argument("path", type=Path)
+
+    args = parser.parse_args(argv)
+    repo = create_repository(args.backend)
+    repo.init_storage()
+    if args.command == "export":
+        target = export_workbook(repo, args.path)
+        print(f"Exported to {target}")
+    else:
+        counts = import_workbook(repo, args.path)
+        summary = ", ".join(f"{name}={count}" for name, count in counts.items())
+        print(f"Imported {args.path}: {summary}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,16 +4,48 @@ import os
 from dataclasses import dataclass
 from pathlib import Path
 
+# Per-process sessions break once requests from one browser land on different
+# workers. uvicorn reads WEB_CONCURRENCY as its default worker count but
+# ``--workers`` does not set it, so that launch needs an explicit backend.
+_MULTI_WORKER = int(os.getenv("WEB_CONCURRENCY", "1")) > 1
+
 
 @dataclass(frozen=True)
 class Settings:
+    backend: str = os.getenv("DESK_APP_BACKEND", "excel")
     data_file: Path = Path(os.getenv("DESK_APP_DATA_FILE", "data/reservations.xlsx"))
     backup_dir: Path = Path(os.getenv("DESK_APP_BACKUP_DIR", "data/backups"))
+    backup_keep_all_minutes: int = int(os.getenv("DESK_APP_BACKUP_KEEP_ALL_MINUTES", "60"))
+    backup_hourly_hours: int = int(os.getenv("DESK_APP_BACKUP_HOURLY_HOURS", "24"))
+    backup_daily_days: int = int(os.getenv("DESK_APP_BACKUP_DAILY_DAYS", "30"))
+    replica_dir: Path | None = Path(os.environ["DESK_APP_REPLICA_DIR"]) if os.getenv("DESK_APP_REPLICA_DIR") else None
+    replica_poll_seconds: float = float(os.getenv("DESK_APP_REPLICA_POLL_SECONDS", "2"))
     lock_file: Path = Path(os.getenv("DESK_APP_LOCK_FILE", "data/reservations.lock"))
+    journal_enabled: bool = os.getenv("DESK_APP_JOURNAL_ENABLED", "false").lower() in {"1", "true", "yes"}
+    journal_file: Path = Path(os.getenv("DESK_APP_JOURNAL_FILE", "data/reservations.journal"))
+    journal_compact_entries: int = int(os.getenv("DESK_APP_JOURNAL_COMPACT_ENTRIES", "200"))
+    journal_compact_seconds: int = int(os.getenv("DESK_APP_JOURNAL_COMPACT_SECONDS", "30"))
+    write_batch_window_ms: float = float(os.getenv("DESK_APP_WRITE_BATCH_WINDOW_MS", "5"))
+    write_batch_max: int = int(os.getenv("DESK_APP_WRITE_BATCH_MAX", "64"))
+    io_read_workers: int = int(os.getenv("DESK_APP_IO_READ_WORKERS", "8"))
+    io_write_workers: int = int(os.getenv("DESK_APP_IO_WRITE_WORKERS", "8"))
+    io_queue_limit: int = int(os.getenv("DESK_APP_IO_QUEUE_LIMIT", "256"))
+    archive_dir: Path = Path(os.getenv("DESK_APP_ARCHIVE_DIR", "data/archive"))
+    archive_partition: str = os.getenv("DESK_APP_ARCHIVE_PARTITION", "month")
+    archive_interval_hours: float = float(os.getenv("DESK_APP_ARCHIVE_INTERVAL_HOURS", "0"))
+    sqlite_file: Path = Path(os.getenv("DESK_APP_SQLITE_FILE", "data/reservations.db"))
+    export_file: Path = Path(os.getenv("DESK_APP_EXPORT_FILE", "data/exports/reservations.xlsx"))
+    export_interval_minutes: int = int(os.getenv("DESK_APP_EXPORT_INTERVAL_MINUTES", "0"))
     otp_ttl_minutes: int = int(os.getenv("DESK_APP_OTP_TTL_MINUTES", "10"))
     otp_max_attempts: int = int(os.getenv("DESK_APP_OTP_MAX_ATTEMPTS", "5"))
     otp_length: int = int(os.getenv("DESK_APP_OTP_LENGTH", "6"))
     session_ttl_hours: int = int(os.getenv("DESK_APP_SESSION_TTL_HOURS", "12"))
+    session_backend: str = os.getenv("DESK_APP_SESSION_BACKEND", "sqlite" if _MULTI_WORKER else "memory")
+    session_file: Path = Path(os.getenv("DESK_APP_SESSION_FILE", "data/sessions.db"))
+    session_max_entries: int = int(os.getenv("DESK_APP_SESSION_MAX_ENTRIES", "10000"))
+    principal_ttl_seconds: float = float(os.getenv("DESK_APP_PRINCIPAL_TTL_SECONDS", "30"))
+    shared_state_file: Path = Path(os.getenv("DESK_APP_SHARED_STATE_FILE", "data/shared.counters"))
+    change_poll_seconds: float = float(os.getenv("DESK_APP_CHANGE_POLL_SECONDS", "0.5"))
     smtp_host: str | None = os.getenv("SMTP_HOST")
     smtp_port: int = int(os.getenv("SMTP_PORT", "587"))
     smtp_username: str | None = os.getenv("SMTP_USERNAME")
@@ -11,6 +11,10 @@ SLOT_FULL = "FULL"
 SLOTS = {SLOT_AM, SLOT_PM}
 REQUEST_SLOTS = {SLOT_AM, SLOT_PM, SLOT_FULL}
 
+OP_CREATE = "create"
+OP_UPDATE = "update"
+OP_CANCEL = "cancel"
+
 SLOT_LABELS = {
     SLOT_AM: (time(hour=8), time(hour=12, minute=30)),
     SLOT_PM: (time(hour=12, minute=30), time(hour=17)),
@@ -28,6 +32,7 @@ RESERVATIONS_HEADERS = [
     "slot",
     "created_at",
     "updated_at",
+    "version",
 ]
 ABSENCES_HEADERS = [
     "absence_id",
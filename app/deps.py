@@ -1,23 +1,60 @@
 from __future__ import annotations
 
+from typing import Any, Callable, TypeVar
+
 from fastapi import Header, HTTPException
 
+from app.backups import BackupStore
+from app.config import settings
+from app.excel_bridge import ExportScheduler
+from app.executor import StorageExecutor
 from app.repository import ExcelRepository
 from app.security import AuthStore
 from app.services import ReservationService
+from app.shared_state import SharedCounters
+from app.storage import create_repository
+
+T = TypeVar("T")
 
-repo = ExcelRepository()
+repo = create_repository()
 auth_store = AuthStore()
-service = ReservationService(repo=repo)
-def require_user(token: str | None = Header(default=None, alias="Authorization")):
+storage_io = StorageExecutor.from_settings()
+counters = SharedCounters(settings.shared_state_file)
+# Share the Excel repository's store so one worker ingests and prunes.
+backups = repo.backups if isinstance(repo, ExcelRepository) else BackupStore(settings.backup_dir)
+service = ReservationService(
+    repo=repo,
+    backups=backups,
+    io=storage_io,
+    counters=counters,
+)
+export_scheduler = ExportScheduler(
+    repo=repo,
+    target=settings.export_file,
+    interval_seconds=settings.export_interval_minutes * 60,
+)
+
+
+async def session_call(fn: Callable[..., T], *args: Any, write: bool = False) -> T:
+    # The SQLite session store blocks on disk and its busy timeout, so it runs
+    # on the storage lanes; the in-memory store is cheap enough to call inline.
+    if not auth_store.sessions_block:
+        return fn(*args)
+    lane = storage_io.write if write else storage_io.read
+    return await lane(fn, *args)
+
+
+async def require_user(token: str | None = Header(default=None, alias="Authorization")):
     if not token:
         raise HTTPException(status_code=401, detail="Missing Authorization header")
     parts = token.split(" ", 1)
     if len(parts) != 2 or parts[0].lower() != "bearer":
         raise HTTPException(status_code=401, detail="Invalid Authorization header")
     session_token = parts[1].strip()
-    user_id = auth_store.get_session_user(session_token)
+    user_id = await session_call(auth_store.get_session_user, session_token)
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid or expired session")
-    user = service.get_user_or_404(user_id)
+    user = service.cached_principal(user_id)
+    if user is None:
+        user = await storage_io.read(service.get_principal, user_id)
     return user
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any
 
 from app.constants import REQUEST_SLOTS, SLOT_AM, SLOT_FULL, SLOT_PM, WORKDAYS
 
@@ -34,3 +36,20 @@ def normalize_bool(value: object) -> bool:
     if isinstance(value, str):
         return value.strip().lower() in {"1", "true", "yes", "y"}
     return False
+
+
+# Cached so rows on the same day share one ``date`` and each distinct value is
+# parsed once.
+@lru_cache(maxsize=4096)
+def parse_date(raw: Any) -> date:
+    if isinstance(raw, date) and not isinstance(raw, datetime):
+        return raw
+    if isinstance(raw, datetime):
+        return raw.date()
+    return date.fromisoformat(str(raw))
+
+
+def parse_datetime(raw: Any) -> datetime:
+    if isinstance(raw, datetime):
+        return raw
+    return datetime.fromisoformat(str(raw))
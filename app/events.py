@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from typing import Any
+
+
+class Subscription:
+    def __init__(self, bus: EventBus, loop: asyncio.AbstractEventLoop, max_pending: int) -> None:
+        self._bus = bus
+        self._loop = loop
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_pending)
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self._bus._unsubscribe(self)
+
+    def __enter__(self) -> Subscription:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _offer(self, payload: str) -> None:
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # A client this far behind is told to refetch instead of catching up.
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(json.dumps({"reload": True}))
+
+
+# Fans change events out to connected clients. ``publish`` may be called from
+# any thread; each subscriber receives JSON payloads on its own event loop.
+class EventBus:
+    def __init__(self, max_pending: int = 100) -> None:
+        self.max_pending = max_pending
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, asyncio.get_running_loop(), self.max_pending)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def publish(self, event: dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        payload = json.dumps(event, separators=(",", ":"))
+        for subscription in subscribers:
+            try:
+                subscription._loop.call_soon_threadsafe(subscription._offer, payload)
+            except RuntimeError:  # the subscriber's loop has shut down
+                self._unsubscribe(subscription)
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any
+
+from filelock import FileLock, Timeout
+from openpyxl import Workbook, load_workbook
+
+from app.constants import (
+    ABSENCES_HEADERS,
+    DESKS_HEADERS,
+    META_HEADERS,
+    RESERVATIONS_HEADERS,
+    SHEETS,
+    USERS_HEADERS,
+)
+from app.storage import Repository
+from app.store import Tables
+
+SHEET_HEADERS = {
+    "users": USERS_HEADERS,
+    "desks": DESKS_HEADERS,
+    "reservations": RESERVATIONS_HEADERS,
+    "absences": ABSENCES_HEADERS,
+    "meta": META_HEADERS,
+}
+
+
+def build_workbook(tables: Tables) -> Workbook:
+    wb = Workbook(write_only=True)
+    for name in SHEETS:
+        headers = SHEET_HEADERS[name]
+        ws = wb.create_sheet(name)
+        ws.append(headers)
+        for row in getattr(tables, name):
+            ws.append([row.get(header) for header in headers])
+    return wb
+
+
+def write_workbook(tables: Tables, target: Path) -> Path:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile(suffix=".xlsx", dir=target.parent, delete=False) as tmp:
+        temp_path = Path(tmp.name)
+    try:
+        build_workbook(tables).save(temp_path)
+        temp_path.replace(target)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return target
+
+
+def read_workbook(source: Path) -> Tables:
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheets: dict[str, list[dict[str, Any]]] = {}
+        for name in SHEETS:
+            if name not in wb.sheetnames:
+                sheets[name] = []
+                continue
+            sheets[name] = _read_rows(wb[name].iter_rows(values_only=True), SHEET_HEADERS[name])
+        return Tables(**sheets)
+    finally:
+        wb.close()
+
+
+def export_workbook(repo: Repository, target: Path) -> Path:
+    return write_workbook(repo.snapshot_tables(), target)
+
+
+def import_workbook(repo: Repository, source: Path) -> dict[str, int]:
+    tables = read_workbook(source)
+    repo.replace_tables(tables)
+    return {name: len(getattr(tables, name)) for name in SHEETS}
+
+
+def _read_rows(rows: Any, headers: list[str]) -> list[dict[str, Any]]:
+    header_row = next(rows, None)
+    if header_row is None:
+        return []
+    # Map by header name when the sheet has a recognizable header row; a
+    # column missing from it imports as empty. Without one, use column order.
+    positions = {str(value).strip(): index for index, value in enumerate(header_row) if value is not None}
+    if positions.keys() & set(headers):
+        columns = [positions.get(header) for header in headers]
+    else:
+        columns = list(range(len(headers)))
+    result: list[dict[str, Any]] = []
+    for row in rows:
+        if all(item is None for item in row):
+            continue
+        result.append(
+            {
+                header: _cell_value(row[column]) if column is not None and column < len(row) else None
+                for header, column in zip(headers, columns)
+            }
+        )
+    return result
+
+
+def _cell_value(value: Any) -> Any:
+    if isinstance(value, datetime) and value.time() == datetime.min.time():
+        return value.date().isoformat()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class ExportScheduler:
+    def __init__(self, repo: Repository, target: Path, interval_seconds: float) -> None:
+        self.repo = repo
+        self.target = target
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="excel-export", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def run_once(self) -> bool:
+        # Every uvicorn worker runs a scheduler; the lock plus the freshness
+        # check leave one export per interval instead of one per worker.
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with FileLock(str(self.target) + ".lock", timeout=0):
+                if self.target.exists() and time.time() - self.target.stat().st_mtime < self.interval_seconds / 2:
+                    return False
+                export_workbook(self.repo, self.target)
+                return True
+        except Timeout:
+            return False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as exc:  # keep the schedule alive across transient failures
+                print(f"[WARN] Scheduled export to {self.target} failed: {exc}")
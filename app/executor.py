@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+class Lane:
+    def __init__(self, name: str, workers: int, queue_limit: int) -> None:
+        self.name = name
+        self.queue_limit = queue_limit
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"storage-{name}")
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            if self.queued + self.running >= self.queue_limit:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail=f"Storage {self.name} queue is full")
+            self.queued += 1
+        future = self._pool.submit(partial(self._call, time.monotonic(), fn, *args, **kwargs))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A request abandoned before its turn never reaches ``_call``.
+            if future.cancel() or future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+            raise
+
+    def metrics(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_ms_avg": 1000 * self.wait_seconds_total / self.completed if self.completed else 0.0,
+                "wait_ms_max": 1000 * self.wait_seconds_max,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def _call(self, submitted: float, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        waited = time.monotonic() - submitted
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+
+# Separate read and write pools so a burst of slow workbook writes (which
+# serialize on the file lock) cannot occupy the threads reads need.
+class StorageExecutor:
+    def __init__(self, read_workers: int, write_workers: int, queue_limit: int) -> None:
+        self.reads = Lane("read", read_workers, queue_limit)
+        self.writes = Lane("write", write_workers, queue_limit)
+
+    @classmethod
+    def from_settings(cls) -> StorageExecutor:
+        return cls(
+            read_workers=settings.io_read_workers,
+            write_workers=settings.io_write_workers,
+            queue_limit=settings.io_queue_limit,
+        )
+
+    async def read(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self.reads.run(fn, *args, **kwargs)
+
+    async def write(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self.writes.run(fn, *args, **kwargs)
+
+    def metrics(self) -> dict[str, dict[str, float]]:
+        return {"read": self.reads.metrics(), "write": self.writes.metrics()}
+
+    def shutdown(self) -> None:
+        self.reads.shutdown()
+        self.writes.shutdown()
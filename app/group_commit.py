@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.store import TableStore
+
+Mutator = Callable[[TableStore], Any]
+
+
+@dataclass
+class WriteOutcome:
+    result: Any = None
+    error: Exception | None = None
+    changed: bool = False
+
+
+@dataclass
+class PendingWrite:
+    mutator: Mutator
+    outcome: WriteOutcome | None = None
+    failure: BaseException | None = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.outcome is not None or self.failure is not None
+
+
+# Coalesces concurrent writes into one commit. The first caller to find no
+# active leader becomes the leader: it waits up to ``window_seconds`` (or until
+# ``max_batch`` writes are queued), hands the batch to ``commit`` and resolves
+# every caller, repeating until its own write is done. Other callers just wait.
+class GroupCommitter:
+    def __init__(
+        self,
+        commit: Callable[[list[Mutator]], list[WriteOutcome]],
+        window_seconds: float,
+        max_batch: int,
+    ) -> None:
+        self.commit = commit
+        self.window_seconds = window_seconds
+        self.max_batch = max(1, max_batch)
+        self._pending: list[PendingWrite] = []
+        self._cond = threading.Condition()
+        self._leading = False
+
+    def submit(self, mutator: Mutator) -> Any:
+        write = PendingWrite(mutator)
+        with self._cond:
+            self._pending.append(write)
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+            while self._leading and not write.done:
+                self._cond.wait()
+            if not write.done:
+                self._leading = True
+        if not write.done:
+            self._lead(write)
+        if write.failure is not None:
+            raise write.failure
+        if write.outcome.error is not None:
+            raise write.outcome.error
+        return write.outcome.result
+
+    def _lead(self, own: PendingWrite) -> None:
+        try:
+            while not own.done:
+                with self._cond:
+                    if self.window_seconds > 0 and len(self._pending) < self.max_batch:
+                        self._cond.wait(self.window_seconds)
+                    batch = self._pending[: self.max_batch]
+                    del self._pending[: self.max_batch]
+                try:
+                    outcomes = self.commit([item.mutator for item in batch])
+                except BaseException as exc:  # the whole group failed to persist
+                    for item in batch:
+                        item.failure = exc
+                else:
+                    for item, outcome in zip(batch, outcomes):
+                        item.outcome = outcome
+                with self._cond:
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._leading = False
+                self._cond.notify_all()
+
+
+def apply_group(new_store: Callable[[], TableStore], mutators: list[Mutator]) -> tuple[TableStore, list[WriteOutcome]]:
+    store = new_store()
+    outcomes: list[WriteOutcome] = []
+    applied: list[int] = []
+    for index, mutator in enumerate(mutators):
+        before = store.mutations
+        try:
+            result = mutator(store)
+            outcomes.append(WriteOutcome(result=result, changed=store.mutations != before))
+            applied.append(index)
+            continue
+        except Exception as exc:
+            outcomes.append(WriteOutcome(error=exc))
+        if store.mutations == before:
+            continue
+        # The failed mutator got part way; rebuild and replay the ones that
+        # succeeded so its half-applied rows are dropped.
+        store = new_store()
+        for prior in applied:
+            replayed = store.mutations
+            result = mutators[prior](store)
+            outcomes[prior] = WriteOutcome(result=result, changed=store.mutations != replayed)
+    return store, outcomes
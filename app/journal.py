@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable
+
+JournalRecord = list[list[Any]]
+
+
+class Journal:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def size(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, record: JournalRecord) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(record, default=_json_default, separators=(",", ":")) + "\n"
+        with self.path.open("ab") as handle:
+            start = handle.tell()
+            try:
+                handle.write(line.encode("utf-8"))
+                handle.flush()
+                os.fsync(handle.fileno())
+            except OSError:
+                # Drop a torn line so the next append doesn't extend it.
+                handle.truncate(start)
+                raise
+            return handle.tell()
+
+    def read_from(self, offset: int) -> tuple[list[JournalRecord], int]:
+        try:
+            with self.path.open("rb") as handle:
+                handle.seek(offset)
+                payload = handle.read()
+        except FileNotFoundError:
+            return [], 0
+        records: list[JournalRecord] = []
+        position = offset
+        for line in payload.splitlines(keepends=True):
+            # A line without its newline is an append still in flight (or torn
+            # by a crash); it is picked up by a later read or dropped.
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"[WARN] Ignoring corrupt journal tail in {self.path} at offset {position}")
+                break
+            position += len(line)
+        return records, position
+
+    def truncate(self) -> None:
+        with self.path.open("wb") as handle:
+            handle.flush()
+            os.fsync(handle.fileno())
+
+
+class JournalCompactor:
+    def __init__(self, compact: Callable[[], bool], max_entries: int, interval_seconds: float) -> None:
+        self.compact = compact
+        self.max_entries = max_entries
+        self.interval_seconds = interval_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="journal-compactor", daemon=True)
+            self._thread.start()
+
+    def notify(self, pending_entries: int) -> None:
+        self.start()
+        if pending_entries >= self.max_entries:
+            self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.compact()
+            except Exception as exc:  # the journal stays authoritative until the next attempt
+                print(f"[WARN] Journal compaction failed: {exc}")
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Unsupported journal value: {value!r}")
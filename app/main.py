@@ -1,91 +1,183 @@
 from __future__ import annotations
 
-from datetime import date
+import asyncio
+import hashlib
+import multiprocessing
+from dataclasses import asdict
+from datetime import date, datetime
 from pathlib import Path
+from typing import Any, Callable
 
-from fastapi import Depends, FastAPI, Header, Query
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-
-from app.deps import auth_store, repo, require_user, service
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.deps import (
+    auth_store,
+    counters,
+    export_scheduler,
+    repo,
+    require_user,
+    service,
+    session_call,
+    storage_io,
+)
 from app.models import (
     AbsenceUpsert,
     AdminDeskUpsert,
     AdminUserUpsert,
     AuthToken,
+    BackupInfo,
+    BootstrapResponse,
     DeskRecord,
     ForceCancelRequest,
     NameLoginRequest,
+    ReservationBatch,
     ReservationCreate,
+    ReservationRecord,
     ReservationUpdate,
     StatsResponse,
     UserRecord,
 )
+from app.responses import ENCODING_IDENTITY, EncodedBodyCache, negotiate_encoding
 
 app = FastAPI(title="Desk Reservation API", version="0.1.0")
 STATIC_DIR = Path(__file__).parent / "static"
+STREAM_KEEPALIVE_SECONDS = 15.0
+JSON_BODIES = EncodedBodyCache()
+BOOTSTRAP_JSON = TypeAdapter(BootstrapResponse)
+DESKS_JSON = TypeAdapter(list[DeskRecord])
+USERS_JSON = TypeAdapter(list[UserRecord])
+RESERVATIONS_JSON = TypeAdapter(list[ReservationRecord])
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 
+_background_tasks: set[asyncio.Task[None]] = set()
+
+
+async def _watch_external_changes() -> None:
+    # Under --workers, writes made by sibling processes only show up in the
+    # shared counters; turn them into reload events for this worker's streams.
+    while True:
+        await asyncio.sleep(settings.change_poll_seconds)
+        try:
+            service.sync_external_changes()
+        except Exception as exc:
+            print(f"[WARN] Shared change check failed: {exc}")
+
+
+async def _archive_periodically() -> None:
+    while True:
+        # Sleep first: a restart or deploy never moves rows out by itself.
+        await asyncio.sleep(settings.archive_interval_hours * 3600)
+        try:
+            archived = await storage_io.write(service.archive_past)
+            if archived:
+                print(f"[INFO] Archived {archived} past reservation and absence rows")
+        except Exception as exc:
+            print(f"[WARN] Archiving past rows failed: {exc}")
+
+
 @app.on_event("startup")
-def on_startup() -> None:
-    repo.init_storage()
+async def on_startup() -> None:
+    await storage_io.write(repo.init_storage)
+    if not auth_store.sessions_block and multiprocessing.parent_process() is not None:
+        # uvicorn --workers (and --reload) run the app in a spawned child.
+        print("[WARN] Sessions are per process; set DESK_APP_SESSION_BACKEND=sqlite when running several workers")
+    export_scheduler.start()
+    service.sync_external_changes()
+    _background_tasks.add(asyncio.create_task(_watch_external_changes()))
+    if settings.archive_interval_hours > 0:
+        _background_tasks.add(asyncio.create_task(_archive_periodically()))
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    for task in _background_tasks:
+        task.cancel()
+    _background_tasks.clear()
+    export_scheduler.stop()
+    storage_io.shutdown()
+    repo.close()
+    counters.close()
 
 
 @app.get("/")
-def root() -> RedirectResponse:
+async def root() -> RedirectResponse:
     return RedirectResponse(url="/app")
 
 
 @app.get("/app")
-def app_shell() -> FileResponse:
+async def app_shell() -> FileResponse:
     return FileResponse(STATIC_DIR / "index.html")
 
 
 @app.get("/healthz")
-def healthz() -> dict[str, str]:
+async def healthz() -> dict[str, str]:
     return {"status": "ok"}
 
 
 @app.get("/api/me", response_model=UserRecord)
-def me(user: UserRecord = Depends(require_user)) -> UserRecord:
+async def me(request: Request, response: Response, user: UserRecord = Depends(require_user)):
+    etag = await _data_etag("me", user.user_id)
+    if _not_modified(request, etag):
+        return _not_modified_response(etag)
+    _set_etag(response, etag)
     return user
 
 
+@app.get("/api/bootstrap", response_model=BootstrapResponse)
+async def bootstrap(
+    request: Request,
+    start_date: date | None = Query(default=None),
+    end_date: date | None = Query(default=None),
+    user: UserRecord = Depends(require_user),
+):
+    etag = await _data_etag("bootstrap", user.user_id, start_date, end_date, datetime.utcnow().date())
+    return await _json_response(
+        request, etag, BOOTSTRAP_JSON, service.bootstrap, user=user, start_date=start_date, end_date=end_date
+    )
+
+
 @app.get("/api/desks", response_model=list[DeskRecord])
-def list_desks(user: UserRecord = Depends(require_user)) -> list[DeskRecord]:
+async def list_desks(request: Request, user: UserRecord = Depends(require_user)):
     _ = user
-    return service.list_desks()
+    etag = await _data_etag("desks")
+    return await _json_response(request, etag, DESKS_JSON, service.list_desks)
 
 
 @app.get("/api/users", response_model=list[UserRecord])
-def list_users(user: UserRecord = Depends(require_user)) -> list[UserRecord]:
+async def list_users(request: Request, user: UserRecord = Depends(require_user)):
     _ = user
-    return service.list_users()
+    etag = await _data_etag("users")
+    return await _json_response(request, etag, USERS_JSON, service.list_users)
 
 
 @app.post("/api/auth/login", response_model=AuthToken)
-def login(payload: NameLoginRequest) -> AuthToken:
-    user = service.ensure_user_for_name(payload.name)
-    token = auth_store.create_session(user.user_id)
+async def login(payload: NameLoginRequest) -> AuthToken:
+    user = await storage_io.write(service.ensure_user_for_name, payload.name)
+    token = await session_call(auth_store.create_session, user.user_id, write=True)
     return AuthToken(token=token, user=user)
 
 
 @app.post("/api/auth/logout")
-def logout(
+async def logout(
     user: UserRecord = Depends(require_user),
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict[str, str]:
     _ = user
     parts = (authorization or "").split(" ", 1)
     if len(parts) == 2 and parts[0].lower() == "bearer":
-        auth_store.logout(parts[1].strip())
+        await session_call(auth_store.logout, parts[1].strip(), write=True)
     return {"status": "ok"}
 
 
 @app.post("/api/reservations")
-def create_reservation(payload: ReservationCreate, user: UserRecord = Depends(require_user)):
-    return service.create_reservation(
+async def create_reservation(payload: ReservationCreate, user: UserRecord = Depends(require_user)):
+    return await storage_io.write(
+        service.create_reservation,
         user=user,
         desk_id=payload.desk_id,
         value_date=payload.date,
@@ -93,40 +185,84 @@ def create_reservation(payload: ReservationCreate, user: UserRecord = Depends(re
     )
 
 
+@app.post("/api/reservations/batch")
+async def batch_reservations(payload: ReservationBatch, user: UserRecord = Depends(require_user)):
+    return await storage_io.write(service.apply_batch, user=user, items=payload.items)
+
+
 @app.patch("/api/reservations/{reservation_id}")
-def patch_reservation(
+async def patch_reservation(
     reservation_id: str,
     payload: ReservationUpdate,
+    response: Response,
     user: UserRecord = Depends(require_user),
+    if_match: str | None = Header(default=None, alias="If-Match"),
 ):
-    return service.update_reservation(
+    updated = await storage_io.write(
+        service.update_reservation,
         user=user,
         reservation_id=reservation_id,
         desk_id=payload.desk_id,
         value_date=payload.date,
         request_slot=payload.slot,
+        expected_version=_parse_if_match(if_match),
     )
+    response.headers["ETag"] = f'"{updated.version}"'
+    return updated
 
 
 @app.delete("/api/reservations/{reservation_id}")
-def delete_reservation(reservation_id: str, user: UserRecord = Depends(require_user)) -> dict[str, str]:
-    service.cancel_reservation(actor=user, reservation_id=reservation_id)
+async def delete_reservation(reservation_id: str, user: UserRecord = Depends(require_user)) -> dict[str, str]:
+    await storage_io.write(service.cancel_reservation, actor=user, reservation_id=reservation_id)
     return {"status": "ok"}
 
 
-@app.get("/api/reservations")
-def list_reservations(
+@app.get("/api/reservations", response_model=list[ReservationRecord])
+async def list_reservations(
+    request: Request,
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     user: UserRecord = Depends(require_user),
 ):
     _ = user
-    return service.list_effective_reservations(start_date=start_date, end_date=end_date)
+    # The default window and auto-reservations both depend on today's date.
+    etag = await _data_etag("reservations", start_date, end_date, datetime.utcnow().date())
+    return await _json_response(
+        request,
+        etag,
+        RESERVATIONS_JSON,
+        service.list_effective_reservations,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+@app.get("/api/stream")
+async def stream(request: Request, user: UserRecord = Depends(require_user)) -> StreamingResponse:
+    _ = user
+
+    async def events():
+        with service.events.subscribe() as subscription:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(subscription.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {payload}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.put("/api/named-desk/absences")
-def upsert_absence(payload: AbsenceUpsert, user: UserRecord = Depends(require_user)):
-    return service.upsert_absence(
+async def upsert_absence(payload: AbsenceUpsert, user: UserRecord = Depends(require_user)):
+    return await storage_io.write(
+        service.upsert_absence,
         owner=user,
         desk_id=payload.desk_id,
         value_date=payload.date,
@@ -136,8 +272,9 @@ def upsert_absence(payload: AbsenceUpsert, user: UserRecord = Depends(require_us
 
 
 @app.post("/api/admin/users")
-def admin_upsert_user(payload: AdminUserUpsert, user: UserRecord = Depends(require_user)):
-    return service.admin_upsert_user(
+async def admin_upsert_user(payload: AdminUserUpsert, user: UserRecord = Depends(require_user)):
+    return await storage_io.write(
+        service.admin_upsert_user,
         actor=user,
         name=payload.name,
         enabled=payload.enabled,
@@ -146,8 +283,9 @@ def admin_upsert_user(payload: AdminUserUpsert, user: UserRecord = Depends(requi
 
 
 @app.post("/api/admin/desks")
-def admin_upsert_desk(payload: AdminDeskUpsert, user: UserRecord = Depends(require_user)):
-    return service.admin_upsert_desk(
+async def admin_upsert_desk(payload: AdminDeskUpsert, user: UserRecord = Depends(require_user)):
+    return await storage_io.write(
+        service.admin_upsert_desk,
         actor=user,
         label=payload.label,
         enabled=payload.enabled,
@@ -157,11 +295,108 @@ def admin_upsert_desk(payload: AdminDeskUpsert, user: UserRecord = Depends(requi
 
 
 @app.post("/api/admin/force-cancel")
-def admin_force_cancel(payload: ForceCancelRequest, user: UserRecord = Depends(require_user)) -> dict[str, str]:
-    service.admin_force_cancel(actor=user, reservation_id=payload.reservation_id)
+async def admin_force_cancel(payload: ForceCancelRequest, user: UserRecord = Depends(require_user)) -> dict[str, str]:
+    await storage_io.write(service.admin_force_cancel, actor=user, reservation_id=payload.reservation_id)
     return {"status": "ok"}
 
 
 @app.get("/api/admin/stats", response_model=StatsResponse)
-def admin_stats(user: UserRecord = Depends(require_user)) -> StatsResponse:
-    return StatsResponse(**service.admin_stats(actor=user))
+async def admin_stats(user: UserRecord = Depends(require_user)) -> StatsResponse:
+    return StatsResponse(**await storage_io.read(service.admin_stats, actor=user))
+
+
+@app.get("/api/admin/io-metrics")
+async def admin_io_metrics(user: UserRecord = Depends(require_user)) -> dict[str, dict[str, float]]:
+    return service.admin_io_metrics(actor=user)
+
+
+@app.get("/api/admin/reservations/history", response_model=list[ReservationRecord])
+async def admin_reservation_history(
+    start_date: date = Query(),
+    end_date: date = Query(),
+    user: UserRecord = Depends(require_user),
+) -> list[ReservationRecord]:
+    return await storage_io.read(
+        service.admin_reservation_history, actor=user, start_date=start_date, end_date=end_date
+    )
+
+
+@app.get("/api/admin/export")
+async def admin_export(user: UserRecord = Depends(require_user)) -> FileResponse:
+    path = await storage_io.read(service.admin_export, actor=user)
+    return FileResponse(
+        path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=path.name,
+    )
+
+
+@app.post("/api/admin/import")
+async def admin_import(request: Request, user: UserRecord = Depends(require_user)) -> dict[str, int]:
+    payload = await request.body()
+    return await storage_io.write(service.admin_import, actor=user, payload=payload)
+
+
+@app.get("/api/admin/backups", response_model=list[BackupInfo])
+async def admin_list_backups(user: UserRecord = Depends(require_user)) -> list[BackupInfo]:
+    entries = await storage_io.read(service.admin_list_backups, actor=user)
+    return [BackupInfo(**asdict(entry)) for entry in entries]
+
+
+@app.post("/api/admin/backups/{backup_id}/restore")
+async def admin_restore_backup(backup_id: str, user: UserRecord = Depends(require_user)) -> dict[str, int]:
+    return await storage_io.write(service.admin_restore_backup, actor=user, backup_id=backup_id)
+
+
+def _parse_if_match(value: str | None) -> int | None:
+    if value is None or value.strip() == "*":
+        return None
+    tag = value.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match must be a reservation version")
+    return int(tag)
+
+
+async def _data_etag(*parts: object) -> str:
+    state = await storage_io.read(repo.data_state)
+    digest = hashlib.sha256(repr((state.tag, *parts)).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    candidates = {item.strip().removeprefix("W/") for item in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def _not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+async def _json_response(
+    request: Request,
+    etag: str,
+    adapter: TypeAdapter[Any],
+    load: Callable[..., Any],
+    **kwargs: Any,
+) -> Response:
+    # The service already returns validated models; serialize them straight to
+    # bytes instead of letting response_model validate them a second time.
+    if _not_modified(request, etag):
+        return _not_modified_response(etag)
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+    cached = JSON_BODIES.get(etag, encoding)
+    if cached is None:
+        cached = await storage_io.read(JSON_BODIES.render, etag, encoding, lambda: adapter.dump_json(load(**kwargs)))
+    body, used = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if used != ENCODING_IDENTITY:
+        headers["Content-Encoding"] = used
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
@@ -35,6 +35,7 @@ class ReservationRecord(BaseModel):
     created_at: datetime
     updated_at: datetime
     auto: bool = False
+    version: int = 1
 
 
 class AbsenceRecord(BaseModel):
@@ -67,6 +68,19 @@ class ReservationUpdate(BaseModel):
     slot: RequestSlotType | None = None
 
 
+class ReservationBatchItem(BaseModel):
+    action: Literal["create", "update", "cancel"]
+    reservation_id: str | None = None
+    desk_id: str | None = None
+    date: DateType | None = None
+    slot: RequestSlotType | None = None
+    version: int | None = None
+
+
+class ReservationBatch(BaseModel):
+    items: list[ReservationBatchItem] = Field(min_length=1, max_length=100)
+
+
 class ReservationsQuery(BaseModel):
     start_date: DateType | None = None
     end_date: DateType | None = None
@@ -100,3 +114,18 @@ class StatsResponse(BaseModel):
     total_reservations: int
     active_users: int
     enabled_desks: int
+
+
+class BootstrapResponse(BaseModel):
+    me: UserRecord
+    users: list[UserRecord]
+    desks: list[DeskRecord]
+    reservations: list[ReservationRecord]
+    version: int = 0
+
+
+class BackupInfo(BaseModel):
+    backup_id: str
+    created_at: datetime
+    sha256: str
+    size: int
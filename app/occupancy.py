@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from app.constants import SLOT_AM, SLOT_PM
+from app.models import AbsenceRecord, DeskRecord, ReservationRecord
+from app.storage import DataState, Repository
+
+SlotKey = tuple[date, str, str]
+ReleaseKey = tuple[str, str, date, str]
+
+
+# Effective desk occupancy for a date window, keyed by (date, slot, desk_id).
+# Owner auto-reservations are implied by enabled owned desks minus released
+# slots and only materialized when ``records`` is called.
+class OccupancyGrid:
+    def __init__(self, start: date, end: date, state: DataState) -> None:
+        self.start = start
+        self.end = end
+        self.version = state.revision
+        self.tag = state.tag
+        self._explicit: dict[str, ReservationRecord] = {}
+        self._by_slot: dict[SlotKey, ReservationRecord] = {}
+        self._by_user: dict[SlotKey, ReservationRecord] = {}
+        self._desks: dict[str, DeskRecord] = {}
+        self._owned: dict[str, set[str]] = {}
+        self._released: set[ReleaseKey] = set()
+
+    @classmethod
+    def build(cls, repo: Repository, start: date, end: date, state: DataState) -> OccupancyGrid:
+        grid = cls(start, end, state)
+        for desk in repo.list_desks():
+            grid.put_desk(desk)
+        for reservation in repo.list_reservations(start, end):
+            grid.put_reservation(reservation)
+        for absence in repo.list_absences():
+            grid.put_absence(absence, released=True)
+        return grid
+
+    def records(self, start: date, end: date) -> list[ReservationRecord]:
+        result = [item for item in self._explicit.values() if start <= item.date <= end]
+        now = datetime.utcnow()
+        cursor = start
+        while cursor <= end:
+            for desk_id in self._desks:
+                for slot in (SLOT_AM, SLOT_PM):
+                    if (cursor, slot, desk_id) in self._by_slot:
+                        continue
+                    auto = self._auto(cursor, slot, desk_id, now)
+                    if auto is not None:
+                        result.append(auto)
+            cursor += timedelta(days=1)
+        return result
+
+    def desk_holder(self, value_date: date, slot: str, desk_id: str) -> ReservationRecord | None:
+        explicit = self._by_slot.get((value_date, slot, desk_id))
+        if explicit is not None:
+            return explicit
+        return self._auto(value_date, slot, desk_id, datetime.utcnow())
+
+    def user_holdings(self, value_date: date, slot: str, user_id: str) -> list[ReservationRecord]:
+        held: list[ReservationRecord] = []
+        explicit = self._by_user.get((value_date, slot, user_id))
+        if explicit is not None:
+            held.append(explicit)
+        now = datetime.utcnow()
+        for desk_id in self._owned.get(user_id, ()):
+            if (value_date, slot, desk_id) in self._by_slot:
+                continue
+            auto = self._auto(value_date, slot, desk_id, now)
+            if auto is not None:
+                held.append(auto)
+        return held
+
+    def is_released(self, owner_user_id: str, desk_id: str, value_date: date, slot: str) -> bool:
+        return (owner_user_id, desk_id, value_date, slot) in self._released
+
+    def put_desk(self, desk: DeskRecord) -> None:
+        previous = self._desks.pop(desk.desk_id, None)
+        if previous is not None and previous.owner_user_id:
+            self._owned.get(previous.owner_user_id, set()).discard(desk.desk_id)
+        if not desk.enabled:
+            return
+        self._desks[desk.desk_id] = desk
+        if desk.owner_user_id:
+            self._owned.setdefault(desk.owner_user_id, set()).add(desk.desk_id)
+
+    def put_reservation(self, reservation: ReservationRecord) -> list[SlotKey]:
+        touched = self.drop_reservation(reservation.reservation_id)
+        if not self.start <= reservation.date <= self.end:
+            return touched
+        self._explicit[reservation.reservation_id] = reservation
+        key = (reservation.date, reservation.slot, reservation.desk_id)
+        self._by_slot.setdefault(key, reservation)
+        self._by_user.setdefault((reservation.date, reservation.slot, reservation.user_id), reservation)
+        return [*touched, key]
+
+    def drop_reservation(self, reservation_id: str) -> list[SlotKey]:
+        existing = self._explicit.pop(reservation_id, None)
+        if existing is None:
+            return []
+        for index, key in (
+            (self._by_slot, (existing.date, existing.slot, existing.desk_id)),
+            (self._by_user, (existing.date, existing.slot, existing.user_id)),
+        ):
+            if index.get(key) is existing:
+                del index[key]
+        return [(existing.date, existing.slot, existing.desk_id)]
+
+    def put_absence(self, absence: AbsenceRecord, released: bool) -> None:
+        self.set_released(absence.owner_user_id, absence.desk_id, absence.date, absence.slot, released)
+
+    def set_released(
+        self, owner_user_id: str, desk_id: str, value_date: date, slot: str, released: bool
+    ) -> list[SlotKey]:
+        if not self.start <= value_date <= self.end:
+            return []
+        key = (owner_user_id, desk_id, value_date, slot)
+        if released:
+            self._released.add(key)
+        else:
+            self._released.discard(key)
+        return [(value_date, slot, desk_id)]
+
+    def _auto(self, value_date: date, slot: str, desk_id: str, now: datetime) -> ReservationRecord | None:
+        if not self.start <= value_date <= self.end:
+            return None
+        desk = self._desks.get(desk_id)
+        if desk is None or not desk.owner_user_id:
+            return None
+        if (desk.owner_user_id, desk_id, value_date, slot) in self._released:
+            return None
+        return ReservationRecord(
+            reservation_id=f"auto-{desk_id}-{value_date.isoformat()}-{slot}",
+            user_id=desk.owner_user_id,
+            desk_id=desk_id,
+            date=value_date,
+            slot=slot,
+            created_at=now,
+            updated_at=now,
+            auto=True,
+        )
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Callable, ContextManager
+
+
+# Local working copy of a workbook that lives on a network share. The
+# repository reads and writes ``local``; a worker thread pushes each change to
+# the share and pulls in edits made directly on the share, found by a stat
+# poll. While the share is unreachable pushes stay queued, and a marker file
+# beside the replica lets a restart resume them.
+class ShareReplica:
+    def __init__(
+        self,
+        share: Path,
+        local: Path,
+        poll_seconds: float,
+        guard: Callable[[], ContextManager[Any]],
+    ) -> None:
+        self.share = share
+        self.local = local
+        self.poll_seconds = poll_seconds
+        self.guard = guard
+        self.last_error: str | None = None
+        self.last_sync_at: float | None = None
+        self._synced: tuple[int, int] | None = None
+        self._generation = 0
+        self._pushed_generation = 0
+        self._prepared = False
+        self._state_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def pending_marker(self) -> Path:
+        return self.local.with_name(self.local.name + ".pending")
+
+    @property
+    def pending(self) -> bool:
+        with self._state_lock:
+            return self._generation != self._pushed_generation
+
+    def prepare(self) -> None:
+        if self._prepared:
+            return
+        with self._state_lock:
+            if self._prepared:
+                return
+            self.local.parent.mkdir(parents=True, exist_ok=True)
+            if self.pending_marker.exists() and self.local.exists():
+                # The last run stopped with changes the share never received.
+                self._generation += 1
+            elif self._share_reachable() and self.share.exists():
+                self._synced = _signature(self.share)
+                _copy_atomic(self.share, self.local)
+                self.last_sync_at = time.time()
+            elif not self._share_reachable():
+                if not self.local.exists():
+                    raise RuntimeError(f"Network share {self.share.parent} is unavailable and no local replica exists")
+                # Serve the last copy; the poll pulls once the share is back.
+            elif self.local.exists():
+                self._generation += 1
+            self._prepared = True
+        self._start()
+
+    def notify(self) -> None:
+        with self._state_lock:
+            self._generation += 1
+            self.pending_marker.touch()
+        self._wake.set()
+
+    def poll(self) -> None:
+        if self.pending:
+            self.push()
+            return
+        try:
+            signature = _signature(self.share)
+        except OSError:
+            return
+        if signature != self._synced:
+            self.pull()
+
+    def push(self) -> bool:
+        with self._sync_lock:
+            with self._state_lock:
+                generation = self._generation
+                if generation == self._pushed_generation:
+                    return False
+            try:
+                self._preserve_external_edit()
+                _copy_atomic(self.local, self.share)
+                self._synced = _signature(self.share)
+            except OSError as exc:
+                self._failed("push", exc)
+                return False
+            with self._state_lock:
+                self._pushed_generation = generation
+                if self._generation == generation:
+                    self.pending_marker.unlink(missing_ok=True)
+            self._recovered()
+            return True
+
+    def pull(self) -> bool:
+        with self._sync_lock, self.guard():
+            if self.pending:
+                return False
+            try:
+                signature = _signature(self.share)
+                _copy_atomic(self.share, self.local)
+            except OSError as exc:
+                self._failed("pull", exc)
+                return False
+            # A save that lands mid-copy changes the signature again, so the
+            # next poll copies once more.
+            self._synced = signature
+            self._recovered()
+            return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.push()
+
+    def _start(self) -> None:
+        with self._state_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="share-replica", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.poll()
+            except Exception as exc:  # keep polling across unexpected failures
+                print(f"[WARN] Share replica sync failed: {exc}")
+
+    def _preserve_external_edit(self) -> None:
+        # Someone saved the share while our changes were queued; keep their
+        # copy beside the replica instead of silently overwriting it.
+        if self._synced is None or not self.share.exists():
+            return
+        if _signature(self.share) == self._synced:
+            return
+        stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        conflict = self.local.with_name(f"{self.local.stem}.conflict-{stamp}{self.local.suffix}")
+        shutil.copyfile(self.share, conflict)
+        print(f"[WARN] {self.share} changed while offline; saved that copy to {conflict}")
+
+    def _share_reachable(self) -> bool:
+        try:
+            return self.share.parent.is_dir()
+        except OSError:
+            return False
+
+    def _failed(self, action: str, exc: OSError) -> None:
+        if self.last_error is None:
+            print(f"[WARN] Share {action} to {self.share} failed, queuing changes locally: {exc}")
+        self.last_error = str(exc)
+
+    def _recovered(self) -> None:
+        if self.last_error is not None:
+            print(f"[INFO] Share {self.share} reachable again")
+        self.last_error = None
+        self.last_sync_at = time.time()
+
+
+def _signature(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _copy_atomic(source: Path, target: Path) -> None:
+    # The temp file sits beside the target so the rename never crosses devices.
+    with NamedTemporaryFile(suffix=target.suffix, dir=target.parent, delete=False) as tmp:
+        temp_path = Path(tmp.name)
+    try:
+        shutil.copyfile(source, temp_path)
+        temp_path.replace(target)
+    finally:
+        temp_path.unlink(missing_ok=True)
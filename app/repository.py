@@ -1,47 +1,106 @@
 from __future__ import annotations
 
-import shutil
+import threading
 import uuid
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass
 from datetime import date, datetime
+from functools import partial
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import Any, Callable
+from typing import Any, Iterator
 
 from filelock import FileLock
 from openpyxl import Workbook, load_workbook
 
+from app.archive import ReservationArchive
+from app.backups import BackupStore
 from app.config import settings
 from app.constants import (
     ABSENCES_HEADERS,
     DESKS_HEADERS,
     META_HEADERS,
+    OP_CANCEL,
+    OP_CREATE,
+    OP_UPDATE,
     RESERVATIONS_HEADERS,
+    SHEETS,
     USERS_HEADERS,
 )
-from app.domain import normalize_bool
+from app.domain import normalize_bool, parse_date, parse_datetime
+from app.excel_bridge import build_workbook
+from app.group_commit import GroupCommitter, Mutator, WriteOutcome, apply_group
+from app.journal import Journal, JournalCompactor
 from app.models import AbsenceRecord, DeskRecord, ReservationRecord, UserRecord
+from app.replica import ShareReplica
+from app.rows import ROW_TYPES
+from app.storage import DataState
+from app.store import PRIMARY_KEYS, ReservationOp, TableStore, Tables, VersionConflictError, row_user_name
+
+
+class StaleSnapshotError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    signature: tuple[int, int, int]
+    store: TableStore
 
 
 @dataclass
-class Tables:
-    users: list[dict[str, Any]]
-    desks: list[dict[str, Any]]
-    reservations: list[dict[str, Any]]
-    absences: list[dict[str, Any]]
-    meta: list[dict[str, Any]]
+class JournalState:
+    signature: tuple[int, int, int]
+    store: TableStore
+    offset: int = 0
+    entries: int = 0
 
 
 class ExcelRepository:
     def __init__(self) -> None:
-        self.data_file = settings.data_file
+        self.replica = (
+            ShareReplica(
+                share=settings.data_file,
+                local=settings.replica_dir / settings.data_file.name,
+                poll_seconds=settings.replica_poll_seconds,
+                guard=self._exclusive,
+            )
+            if settings.replica_dir is not None
+            else None
+        )
+        self.data_file = self.replica.local if self.replica is not None else settings.data_file
         self.backup_dir = settings.backup_dir
+        self.archive = ReservationArchive(settings.archive_dir, settings.archive_partition)
         self.lock = FileLock(str(settings.lock_file))
+        self._snapshot: Snapshot | None = None
+        self._pinned = threading.local()
+        self._backups: BackupStore | None = None
+        self.journal = Journal(settings.journal_file) if settings.journal_enabled else None
+        self.compactor = JournalCompactor(
+            compact=self.compact_journal,
+            max_entries=settings.journal_compact_entries,
+            interval_seconds=settings.journal_compact_seconds,
+        )
+        self._journal_state: JournalState | None = None
+        self._journal_lock = threading.RLock()
+        self.writer = GroupCommitter(
+            commit=self._commit_group,
+            window_seconds=settings.write_batch_window_ms / 1000,
+            max_batch=settings.write_batch_max,
+        )
+
+    @property
+    def backups(self) -> BackupStore:
+        if self._backups is None or self._backups.root != self.backup_dir:
+            self._backups = BackupStore(self.backup_dir)
+        return self._backups
 
     def init_storage(self) -> None:
         self.data_file.parent.mkdir(parents=True, exist_ok=True)
         self.backup_dir.mkdir(parents=True, exist_ok=True)
         settings.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        if self.replica is not None:
+            self.replica.prepare()
         if self.data_file.exists():
             return
 
@@ -52,41 +111,24 @@ class ExcelRepository:
             ws = wb.create_sheet(sheet_name)
             ws.append(headers)
         wb.save(self.data_file)
+        if self.replica is not None:
+            self.replica.notify()
 
     def list_users(self) -> list[UserRecord]:
-        tables = self._read_tables()
-        return [
-            UserRecord(
-                user_id=row["user_id"],
-                name=self._normalize_user_name(row),
-                email=row.get("email") or None,
-                enabled=normalize_bool(row["enabled"]),
-                is_admin=normalize_bool(row["is_admin"]),
-                created_at=self._parse_datetime(row["created_at"]),
-            )
-            for row in tables.users
-            if row.get("user_id")
-        ]
+        store = self._read_store("users")
+        return [self._user_record(row) for row in store.rows("users") if row.get("user_id")]
 
     def get_user_by_name(self, name: str) -> UserRecord | None:
-        normalized_name = name.strip().lower()
-        for user in self.list_users():
-            if user.name.strip().lower() == normalized_name:
-                return user
-        return None
+        row = self._read_store("users").user_by_name(name)
+        return self._user_record(row) if row else None
 
     def get_user_by_email(self, email: str) -> UserRecord | None:
-        normalized = email.lower()
-        for user in self.list_users():
-            if user.email and user.email.lower() == normalized:
-                return user
-        return None
+        row = self._read_store("users").user_by_email(email)
+        return self._user_record(row) if row else None
 
     def get_user(self, user_id: str) -> UserRecord | None:
-        for user in self.list_users():
-            if user.user_id == user_id:
-                return user
-        return None
+        row = self._read_store("users").user(user_id)
+        return self._user_record(row) if row else None
 
     def upsert_user(
         self,
@@ -99,16 +141,18 @@ class ExcelRepository:
         normalized_name = name.strip()
         normalized_email = email.lower().strip() if email else None
 
-        def mutate(tables: Tables) -> dict[str, Any]:
-            for row in tables.users:
-                row_name = self._normalize_user_name(row)
-                if row_name.strip().lower() == normalized_name.lower():
-                    row["name"] = normalized_name
-                    if normalized_email is not None:
-                        row["email"] = normalized_email
-                    row["enabled"] = enabled
-                    row["is_admin"] = is_admin
-                    return row
+        def mutate(store: TableStore) -> dict[str, Any]:
+            row = store.user_by_name(normalized_name)
+            if row is not None:
+                changes: dict[str, Any] = {
+                    "name": normalized_name,
+                    "enabled": enabled,
+                    "is_admin": is_admin,
+                }
+                if normalized_email is not None:
+                    changes["email"] = normalized_email
+                store.update_user(row, **changes)
+                return row
             row = {
                 "user_id": uuid.uuid4().hex,
                 "name": normalized_name,
@@ -117,31 +161,15 @@ class ExcelRepository:
                 "is_admin": is_admin,
                 "created_at": now,
             }
-            tables.users.append(row)
+            store.add_user(row)
             return row
 
         row = self._write_tables(mutate)
-        return UserRecord(
-            user_id=row["user_id"],
-            name=self._normalize_user_name(row),
-            email=row.get("email") or None,
-            enabled=normalize_bool(row["enabled"]),
-            is_admin=normalize_bool(row["is_admin"]),
-            created_at=self._parse_datetime(row["created_at"]),
-        )
+        return self._user_record(row)
 
     def list_desks(self) -> list[DeskRecord]:
-        tables = self._read_tables()
-        return [
-            DeskRecord(
-                desk_id=row["desk_id"],
-                label=row["label"],
-                enabled=normalize_bool(row["enabled"]),
-                owner_user_id=row.get("owner_user_id") or None,
-            )
-            for row in tables.desks
-            if row.get("desk_id")
-        ]
+        store = self._read_store("desks")
+        return [self._desk_record(row) for row in store.rows("desks") if row.get("desk_id")]
 
     def upsert_desk(
         self,
@@ -150,15 +178,18 @@ class ExcelRepository:
         owner_user_id: str | None = None,
         desk_id: str | None = None,
     ) -> DeskRecord:
-        def mutate(tables: Tables) -> dict[str, Any]:
+        def mutate(store: TableStore) -> dict[str, Any]:
             target_id = desk_id
             if target_id:
-                for row in tables.desks:
-                    if row.get("desk_id") == target_id:
-                        row["label"] = label
-                        row["enabled"] = enabled
-                        row["owner_user_id"] = owner_user_id
-                        return row
+                row = store.desk(target_id)
+                if row is not None:
+                    store.update_desk(
+                        row,
+                        label=label,
+                        enabled=enabled,
+                        owner_user_id=owner_user_id,
+                    )
+                    return row
 
             new_row = {
                 "desk_id": target_id or uuid.uuid4().hex,
@@ -166,101 +197,39 @@ class ExcelRepository:
                 "enabled": enabled,
                 "owner_user_id": owner_user_id,
             }
-            tables.desks.append(new_row)
+            store.add_desk(new_row)
             return new_row
 
         row = self._write_tables(mutate)
-        return DeskRecord(
-            desk_id=row["desk_id"],
-            label=row["label"],
-            enabled=normalize_bool(row["enabled"]),
-            owner_user_id=row.get("owner_user_id") or None,
-        )
+        return self._desk_record(row)
 
     def get_desk(self, desk_id: str) -> DeskRecord | None:
-        for desk in self.list_desks():
-            if desk.desk_id == desk_id:
-                return desk
-        return None
+        row = self._read_store("desks").desk(desk_id)
+        return self._desk_record(row) if row else None
 
     def list_reservations(
         self,
         start_date: date | None = None,
         end_date: date | None = None,
     ) -> list[ReservationRecord]:
-        tables = self._read_tables()
-        rows: list[ReservationRecord] = []
-        for row in tables.reservations:
-            if not row.get("reservation_id"):
-                continue
-            value_date = self._parse_date(row["date"])
-            if start_date and value_date < start_date:
-                continue
-            if end_date and value_date > end_date:
-                continue
-            rows.append(
-                ReservationRecord(
-                    reservation_id=row["reservation_id"],
-                    user_id=row["user_id"],
-                    desk_id=row["desk_id"],
-                    date=value_date,
-                    slot=row["slot"],
-                    created_at=self._parse_datetime(row["created_at"]),
-                    updated_at=self._parse_datetime(row["updated_at"]),
-                    auto=False,
-                )
-            )
-        return rows
+        store = self._read_store("reservations")
+        return [self._reservation_record(row) for row in store.reservations_between(start_date, end_date)]
 
     def get_reservation(self, reservation_id: str) -> ReservationRecord | None:
-        for item in self.list_reservations():
-            if item.reservation_id == reservation_id:
-                return item
-        return None
+        row = self._read_store("reservations").reservation(reservation_id)
+        return self._reservation_record(row) if row else None
 
     def create_reservation(self, user_id: str, desk_id: str, value_date: date, slot: str) -> ReservationRecord:
         now = datetime.utcnow().isoformat()
 
-        def mutate(tables: Tables) -> dict[str, Any]:
-            for existing in tables.reservations:
-                if (
-                    self._parse_date(existing["date"]) == value_date
-                    and existing["slot"] == slot
-                    and existing["desk_id"] == desk_id
-                ):
-                    raise ValueError("Desk already reserved")
-                if (
-                    self._parse_date(existing["date"]) == value_date
-                    and existing["slot"] == slot
-                    and existing["user_id"] == user_id
-                ):
-                    raise ValueError("User already has a desk in this slot")
-            row = {
-                "reservation_id": uuid.uuid4().hex,
-                "user_id": user_id,
-                "desk_id": desk_id,
-                "date": value_date.isoformat(),
-                "slot": slot,
-                "created_at": now,
-                "updated_at": now,
-            }
-            tables.reservations.append(row)
-            return row
+        def mutate(store: TableStore) -> dict[str, Any]:
+            return self._create_row(store, user_id, desk_id, value_date, slot, now)
 
         try:
             row = self._write_tables(mutate)
         except ValueError as exc:
             raise ValueError(str(exc)) from exc
-        return ReservationRecord(
-            reservation_id=row["reservation_id"],
-            user_id=row["user_id"],
-            desk_id=row["desk_id"],
-            date=self._parse_date(row["date"]),
-            slot=row["slot"],
-            created_at=self._parse_datetime(row["created_at"]),
-            updated_at=self._parse_datetime(row["updated_at"]),
-            auto=False,
-        )
+        return self._reservation_record(row)
 
     def update_reservation(
         self,
@@ -269,34 +238,14 @@ class ExcelRepository:
         desk_id: str,
         value_date: date,
         slot: str,
+        expected_version: int | None = None,
     ) -> ReservationRecord | None:
         now = datetime.utcnow().isoformat()
 
-        def mutate(tables: Tables) -> dict[str, Any] | None:
-            for existing in tables.reservations:
-                if existing.get("reservation_id") == reservation_id:
-                    continue
-                if (
-                    self._parse_date(existing["date"]) == value_date
-                    and existing["slot"] == slot
-                    and existing["desk_id"] == desk_id
-                ):
-                    raise ValueError("Desk already reserved")
-                if (
-                    self._parse_date(existing["date"]) == value_date
-                    and existing["slot"] == slot
-                    and existing["user_id"] == user_id
-                ):
-                    raise ValueError("User already has a desk in this slot")
-            for row in tables.reservations:
-                if row.get("reservation_id") == reservation_id:
-                    row["user_id"] = user_id
-                    row["desk_id"] = desk_id
-                    row["date"] = value_date.isoformat()
-                    row["slot"] = slot
-                    row["updated_at"] = now
-                    return row
-            return None
+        def mutate(store: TableStore) -> dict[str, Any] | None:
+            return self._update_row(
+                store, reservation_id, user_id, desk_id, value_date, slot, now, expected_version
+            )
 
         try:
             row = self._write_tables(mutate)
@@ -304,44 +253,44 @@ class ExcelRepository:
             raise ValueError(str(exc)) from exc
         if not row:
             return None
-        return ReservationRecord(
-            reservation_id=row["reservation_id"],
-            user_id=row["user_id"],
-            desk_id=row["desk_id"],
-            date=self._parse_date(row["date"]),
-            slot=row["slot"],
-            created_at=self._parse_datetime(row["created_at"]),
-            updated_at=self._parse_datetime(row["updated_at"]),
-            auto=False,
-        )
+        return self._reservation_record(row)
 
     def delete_reservation(self, reservation_id: str) -> bool:
-        def mutate(tables: Tables) -> bool:
-            initial = len(tables.reservations)
-            tables.reservations = [
-                row for row in tables.reservations if row.get("reservation_id") != reservation_id
-            ]
-            return len(tables.reservations) != initial
+        def mutate(store: TableStore) -> bool:
+            return store.remove_reservation(reservation_id)
 
         return bool(self._write_tables(mutate))
 
+    def apply_reservation_ops(self, ops: list[ReservationOp]) -> list[ReservationRecord | None]:
+        now = datetime.utcnow().isoformat()
+
+        def mutate(store: TableStore) -> list[dict[str, Any] | None]:
+            results: list[dict[str, Any] | None] = []
+            for op in ops:
+                if op.action == OP_CREATE:
+                    results.append(self._create_row(store, op.user_id, op.desk_id, op.date, op.slot, now))
+                elif op.action == OP_UPDATE:
+                    row = self._update_row(
+                        store, op.reservation_id, op.user_id, op.desk_id, op.date, op.slot, now, op.expected_version
+                    )
+                    if row is None:
+                        raise LookupError("Reservation not found")
+                    results.append(row)
+                elif op.action == OP_CANCEL:
+                    if not store.remove_reservation(op.reservation_id):
+                        raise LookupError("Reservation not found")
+                    results.append(None)
+                else:
+                    raise ValueError(f"Unsupported batch action: {op.action}")
+            return results
+
+        # Any exception leaves the workbook (or journal) untouched.
+        rows = self._write_tables(mutate)
+        return [self._reservation_record(row) if row else None for row in rows]
+
     def list_absences(self) -> list[AbsenceRecord]:
-        tables = self._read_tables()
-        rows: list[AbsenceRecord] = []
-        for row in tables.absences:
-            if not row.get("absence_id"):
-                continue
-            rows.append(
-                AbsenceRecord(
-                    absence_id=row["absence_id"],
-                    owner_user_id=row["owner_user_id"],
-                    desk_id=row["desk_id"],
-                    date=self._parse_date(row["date"]),
-                    slot=row["slot"],
-                    created_at=self._parse_datetime(row["created_at"]),
-                )
-            )
-        return rows
+        store = self._read_store("absences")
+        return [self._absence_record(row) for row in store.rows("absences") if row.get("absence_id")]
 
     def upsert_absence(
         self,
@@ -351,17 +300,10 @@ class ExcelRepository:
         slot: str,
         released: bool,
     ) -> None:
-        def mutate(tables: Tables) -> None:
-            matches = [
-                row
-                for row in tables.absences
-                if row.get("owner_user_id") == owner_user_id
-                and row.get("desk_id") == desk_id
-                and self._parse_date(str(row.get("date"))) == value_date
-                and row.get("slot") == slot
-            ]
+        def mutate(store: TableStore) -> None:
+            matches = store.absences_for(owner_user_id, desk_id, value_date, slot)
             if released and not matches:
-                tables.absences.append(
+                store.add_absence(
                     {
                         "absence_id": uuid.uuid4().hex,
                         "owner_user_id": owner_user_id,
@@ -372,23 +314,144 @@ class ExcelRepository:
                     }
                 )
             if not released and matches:
-                ids = {row.get("absence_id") for row in matches}
-                tables.absences = [
-                    row for row in tables.absences if row.get("absence_id") not in ids
-                ]
+                store.remove_absences(matches)
 
         self._write_tables(mutate)
 
+    def list_reservation_history(self, start_date: date, end_date: date) -> list[ReservationRecord]:
+        archived = {
+            row["reservation_id"]: self._reservation_record(row)
+            for row in self.archive.query("reservations", start_date, end_date)
+        }
+        # A row can sit in both places if archiving stopped before the trim.
+        archived.update((record.reservation_id, record) for record in self.list_reservations(start_date, end_date))
+        return sorted(archived.values(), key=lambda record: (record.date, record.slot, record.desk_id))
+
+    def archive_before(self, cutoff: date) -> int:
+        def mutate(store: TableStore) -> int:
+            reservations = [
+                row
+                for row in store.rows("reservations")
+                if row.get("reservation_id") and self._parse_date(row["date"]) < cutoff
+            ]
+            absences = [
+                row
+                for row in store.rows("absences")
+                if row.get("absence_id") and self._parse_date(row["date"]) < cutoff
+            ]
+            # Archive first: a failure here leaves the live store untouched.
+            self.archive.append("reservations", reservations)
+            self.archive.append("absences", absences)
+            if reservations:
+                store.remove_reservations(reservations)
+            if absences:
+                store.remove_absences(absences)
+            return len(reservations) + len(absences)
+
+        return self._write_tables(mutate)
+
     def stats(self) -> dict[str, int]:
-        users = self.list_users()
-        desks = self.list_desks()
-        reservations = self.list_reservations()
+        store = self._read_store("users", "desks", "reservations")
         return {
-            "total_reservations": len(reservations),
-            "active_users": len([u for u in users if u.enabled]),
-            "enabled_desks": len([d for d in desks if d.enabled]),
+            "total_reservations": len([r for r in store.rows("reservations") if r.get("reservation_id")]),
+            "active_users": len(
+                [u for u in store.rows("users") if u.get("user_id") and normalize_bool(u["enabled"])]
+            ),
+            "enabled_desks": len(
+                [d for d in store.rows("desks") if d.get("desk_id") and normalize_bool(d["enabled"])]
+            ),
         }
 
+    def data_version(self) -> int:
+        return int(self._read_store("meta").meta_value("revision") or 0)
+
+    def data_state(self) -> DataState:
+        snapshot = self._read_snapshot("meta")
+        revision = int(snapshot.store.meta_value("revision") or 0)
+        # Edits that bypass the app (an admin saving or restoring the workbook,
+        # a replica pull) leave the revision alone but never the file itself.
+        mtime_ns, size, inode = snapshot.signature
+        return DataState(revision=revision, tag=f"{revision}-{mtime_ns}-{size}-{inode}")
+
+    @contextmanager
+    def read_snapshot(self) -> Iterator[None]:
+        # Reads on this thread see one store. Workbook snapshots are never
+        # mutated once loaded; the journaled store is, so writers wait.
+        if getattr(self._pinned, "snapshot", None) is not None:
+            yield
+            return
+        self.init_storage()
+        with self._journal_lock if self.journal is not None else nullcontext():
+            self._pinned.snapshot = self._read_snapshot(*SHEETS)
+            try:
+                yield
+            finally:
+                self._pinned.snapshot = None
+
+    def snapshot_tables(self) -> Tables:
+        tables = self._read_store(*SHEETS).tables
+        return Tables(
+            users=[dict(row) for row in tables.users],
+            desks=[dict(row) for row in tables.desks],
+            reservations=[dict(row) for row in tables.reservations],
+            absences=[dict(row) for row in tables.absences],
+            meta=[dict(row) for row in tables.meta],
+        )
+
+    def replace_tables(self, tables: Tables) -> None:
+        self.init_storage()
+        with self.lock, self._journal_lock:
+            revision = max(self.data_version(), _revision_of(tables)) + 1
+            tables = Tables(
+                users=tables.users,
+                desks=tables.desks,
+                reservations=tables.reservations,
+                absences=tables.absences,
+                meta=[row for row in tables.meta if row.get("key") != "revision"]
+                + [{"key": "revision", "value": revision}],
+            )
+            # Parse, index and convert every row first: a rejected import must
+            # leave the workbook exactly as it was.
+            store = TableStore.from_tables(tables)
+            self._check_records(store)
+            self._persist_workbook(build_workbook(tables))
+            self._snapshot = Snapshot(signature=self._file_signature(), store=store)
+            if self.journal is not None:
+                self.journal.truncate()
+                self._journal_state = None
+
+    def compact_journal(self) -> bool:
+        if self.journal is None:
+            return False
+        self.init_storage()
+        with self.lock, self._journal_lock:
+            store = self._journaled_store()
+            state = self._journal_state
+            if state is None or state.entries == 0:
+                return False
+            if store.dirty:
+                wb = load_workbook(self.data_file)
+                try:
+                    headers = self._sheet_headers()
+                    for name in SHEETS:
+                        if name in store.dirty:
+                            self._write_sheet(wb, name, headers[name], store.rows(name))
+                    self._persist_workbook(wb)
+                finally:
+                    wb.close()
+            # Replaying a journal over a snapshot that already contains it is
+            # idempotent, so a crash between persist and truncate is harmless.
+            self.journal.truncate()
+            store.mark_clean()
+            self._journal_state = JournalState(signature=self._file_signature(), store=store)
+            return True
+
+    def close(self) -> None:
+        self.compactor.stop()
+        self.compact_journal()
+        if self.replica is not None:
+            self.replica.stop()
+
     def _sheet_headers(self) -> dict[str, list[str]]:
         return {
             "users": USERS_HEADERS,
@@ -398,67 +461,173 @@ class ExcelRepository:
             "meta": META_HEADERS,
         }
 
-    def _read_tables(self) -> Tables:
-        self.init_storage()
-        wb = load_workbook(self.data_file)
-        try:
-            return Tables(
-                users=self._read_sheet(wb, "users", USERS_HEADERS),
-                desks=self._read_sheet(wb, "desks", DESKS_HEADERS),
-                reservations=self._read_sheet(wb, "reservations", RESERVATIONS_HEADERS),
-                absences=self._read_sheet(wb, "absences", ABSENCES_HEADERS),
-                meta=self._read_sheet(wb, "meta", META_HEADERS),
-            )
-        finally:
-            wb.close()
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        with self.lock, self._journal_lock:
+            yield
 
-    def _write_tables(self, mutator: Callable[[Tables], Any]) -> Any:
+    def _read_store(self, *names: str) -> TableStore:
+        return self._read_snapshot(*names).store
+
+    def _read_snapshot(self, *names: str) -> Snapshot:
+        pinned = getattr(self._pinned, "snapshot", None)
+        if pinned is not None:
+            return pinned
         self.init_storage()
+        if self.journal is not None:
+            with self._journal_lock:
+                store = self._journaled_store()
+                return Snapshot(signature=self._journal_state.signature, store=store)
+        for _ in range(3):
+            signature = self._file_signature()
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.signature != signature:
+                loader = partial(self._load_sheets_read_only, signature)
+                snapshot = Snapshot(signature=signature, store=TableStore(loader=loader))
+            try:
+                snapshot.store.load(*names)
+            except StaleSnapshotError:
+                continue
+            self._snapshot = snapshot
+            return snapshot
+        # The file keeps changing underneath us; serve an uncached parse.
+        signature = self._file_signature()
+        store = TableStore(loader=partial(self._load_sheets_read_only, None))
+        store.load(*names)
+        return Snapshot(signature=signature, store=store)
+
+    def _journaled_store(self) -> TableStore:
+        with self._journal_lock:
+            signature = self._file_signature()
+            state = self._journal_state
+            if state is None or state.signature != signature or self.journal.size() < state.offset:
+                store = TableStore(loader=partial(self._load_sheets_read_only, None))
+                store.load(*SHEETS)
+                state = JournalState(signature=signature, store=store)
+            records, state.offset = self.journal.read_from(state.offset)
+            for record in records:
+                state.store.apply_changes(record)
+            state.store.changes.clear()
+            state.entries += len(records)
+            self._journal_state = state
+            return state.store
+
+    def _write_tables(self, mutator: Mutator) -> Any:
+        self.init_storage()
+        return self.writer.submit(mutator)
+
+    def _commit_group(self, mutators: list[Mutator]) -> list[WriteOutcome]:
+        if self.journal is not None:
+            return self._commit_journaled(mutators)
         with self.lock:
+            snapshot = self._snapshot
+            external = snapshot is not None and snapshot.signature != self._file_signature()
             wb = load_workbook(self.data_file)
             try:
-                tables = Tables(
-                    users=self._read_sheet(wb, "users", USERS_HEADERS),
-                    desks=self._read_sheet(wb, "desks", DESKS_HEADERS),
-                    reservations=self._read_sheet(wb, "reservations", RESERVATIONS_HEADERS),
-                    absences=self._read_sheet(wb, "absences", ABSENCES_HEADERS),
-                    meta=self._read_sheet(wb, "meta", META_HEADERS),
-                )
-                result = mutator(tables)
-                self._write_sheet(wb, "users", USERS_HEADERS, tables.users)
-                self._write_sheet(wb, "desks", DESKS_HEADERS, tables.desks)
-                self._write_sheet(wb, "reservations", RESERVATIONS_HEADERS, tables.reservations)
-                self._write_sheet(wb, "absences", ABSENCES_HEADERS, tables.absences)
-                self._write_sheet(wb, "meta", META_HEADERS, tables.meta)
+                store, outcomes = apply_group(lambda: TableStore(loader=partial(self._load_sheets, wb)), mutators)
+                if not store.dirty:
+                    return outcomes
+                self._bump_revision(store, outcomes, external)
+                headers = self._sheet_headers()
+                # Sheets the mutators never touched stay exactly as loaded.
+                for name in SHEETS:
+                    if name in store.dirty:
+                        self._write_sheet(wb, name, headers[name], store.rows(name))
                 self._persist_workbook(wb)
-                return result
+                signature = self._file_signature()
+                store.mark_clean()
+                store.reset_loader(partial(self._load_sheets_read_only, signature))
+                self._snapshot = Snapshot(signature=signature, store=store)
+                return outcomes
             finally:
                 wb.close()
 
+    def _commit_journaled(self, mutators: list[Mutator]) -> list[WriteOutcome]:
+        with self.lock, self._journal_lock:
+            calls = 0
+
+            def fresh_store() -> TableStore:
+                nonlocal calls
+                calls += 1
+                if calls > 1:
+                    # A mutator half-applied; rebuild from the workbook and journal.
+                    self._journal_state = None
+                return self._journaled_store()
+
+            state = self._journal_state
+            external = state is not None and state.signature != self._file_signature()
+            try:
+                store, outcomes = apply_group(fresh_store, mutators)
+            except BaseException:
+                self._journal_state = None
+                raise
+            if store.changes:
+                self._bump_revision(store, outcomes, external)
+                state = self._journal_state
+                try:
+                    state.offset = self.journal.append(store.take_changes())
+                except BaseException:
+                    # Never made durable; rebuild so readers don't see it.
+                    self._journal_state = None
+                    raise
+                state.entries += 1
+                self.compactor.notify(state.entries)
+            return outcomes
+
+    def _bump_revision(self, store: TableStore, outcomes: list[WriteOutcome], external: bool = False) -> None:
+        # One step per write, not per group, so a caller seeing exactly +1
+        # knows no other write landed alongside its own. A file saved outside
+        # the app since our last read costs one more step for the same reason.
+        writes = sum(1 for outcome in outcomes if outcome.changed)
+        steps = max(1, writes) + int(external)
+        store.set_meta("revision", int(store.meta_value("revision") or 0) + steps)
+
+    def _load_sheets(self, workbook: Workbook, names: list[str]) -> dict[str, list[dict[str, Any]]]:
+        headers = self._sheet_headers()
+        return {name: self._read_sheet(workbook, name, headers[name]) for name in names}
+
+    def _load_sheets_read_only(
+        self,
+        signature: tuple[int, int, int] | None,
+        names: list[str],
+    ) -> dict[str, list[dict[str, Any]]]:
+        wb = load_workbook(self.data_file, read_only=True)
+        try:
+            loaded = self._load_sheets(wb, names)
+        finally:
+            wb.close()
+        if signature is not None and self._file_signature() != signature:
+            raise StaleSnapshotError(str(self.data_file))
+        return loaded
+
+    def _file_signature(self) -> tuple[int, int, int]:
+        stat = self.data_file.stat()
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
     def _persist_workbook(self, workbook: Workbook) -> None:
-        with NamedTemporaryFile(suffix=".xlsx", delete=False) as tmp:
+        # Beside the target, so the final rename stays on one filesystem.
+        with NamedTemporaryFile(suffix=".xlsx", dir=self.data_file.parent, delete=False) as tmp:
             temp_path = Path(tmp.name)
         try:
             workbook.save(temp_path)
             if self.data_file.exists():
-                stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
-                backup_path = self.backup_dir / f"reservations-{stamp}.xlsx"
-                shutil.copy2(self.data_file, backup_path)
+                self.backups.stage(self.data_file)
             temp_path.replace(self.data_file)
         finally:
             if temp_path.exists():
                 temp_path.unlink(missing_ok=True)
+        if self.replica is not None:
+            self.replica.notify()
 
     def _read_sheet(self, workbook: Workbook, name: str, headers: list[str]) -> list[dict[str, Any]]:
         ws = workbook[name]
+        width = len(headers)
+        row_class = ROW_TYPES[name]
         rows: list[dict[str, Any]] = []
-        for row in ws.iter_rows(min_row=2, values_only=True):
+        for row in ws.iter_rows(min_row=2, max_col=width, values_only=True):
             if all(item is None for item in row):
                 continue
-            payload: dict[str, Any] = {}
-            for index, header in enumerate(headers):
-                payload[header] = row[index] if index < len(row) else None
-            rows.append(payload)
+            rows.append(row_class(row[:width]))
         return rows
 
     def _write_sheet(
@@ -476,23 +645,138 @@ class ExcelRepository:
         for row in rows:
             ws.append([row.get(header) for header in headers])
 
+    def _create_row(
+        self,
+        store: TableStore,
+        user_id: str,
+        desk_id: str,
+        value_date: date,
+        slot: str,
+        now: str,
+    ) -> dict[str, Any]:
+        if store.reservation_at(value_date, slot, desk_id) is not None:
+            raise ValueError("Desk already reserved")
+        if store.reservation_for_user(value_date, slot, user_id) is not None:
+            raise ValueError("User already has a desk in this slot")
+        row = {
+            "reservation_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "desk_id": desk_id,
+            "date": value_date.isoformat(),
+            "slot": slot,
+            "created_at": now,
+            "updated_at": now,
+            "version": 1,
+        }
+        store.add_reservation(row)
+        return row
+
+    def _update_row(
+        self,
+        store: TableStore,
+        reservation_id: str,
+        user_id: str,
+        desk_id: str,
+        value_date: date,
+        slot: str,
+        now: str,
+        expected_version: int | None = None,
+    ) -> dict[str, Any] | None:
+        row = store.reservation(reservation_id)
+        if row is not None and expected_version is not None and _row_version(row) != expected_version:
+            raise VersionConflictError("Reservation was modified by someone else")
+        desk_holder = store.reservation_at(value_date, slot, desk_id)
+        if desk_holder is not None and desk_holder is not row:
+            raise ValueError("Desk already reserved")
+        user_holder = store.reservation_for_user(value_date, slot, user_id)
+        if user_holder is not None and user_holder is not row:
+            raise ValueError("User already has a desk in this slot")
+        if row is None:
+            return None
+        store.update_reservation(
+            row,
+            user_id=user_id,
+            desk_id=desk_id,
+            date=value_date.isoformat(),
+            slot=slot,
+            updated_at=now,
+            version=_row_version(row) + 1,
+        )
+        return row
+
+    def _check_records(self, store: TableStore) -> None:
+        converters = {
+            "users": self._user_record,
+            "desks": self._desk_record,
+            "reservations": self._reservation_record,
+            "absences": self._absence_record,
+        }
+        for name, convert in converters.items():
+            for row in store.rows(name):
+                if row.get(PRIMARY_KEYS[name]):
+                    convert(row)
+
+    def _user_record(self, row: dict[str, Any]) -> UserRecord:
+        return UserRecord(
+            user_id=row["user_id"],
+            name=self._normalize_user_name(row),
+            email=row.get("email") or None,
+            enabled=normalize_bool(row["enabled"]),
+            is_admin=normalize_bool(row["is_admin"]),
+            created_at=self._parse_datetime(row["created_at"]),
+        )
+
+    def _desk_record(self, row: dict[str, Any]) -> DeskRecord:
+        return DeskRecord(
+            desk_id=row["desk_id"],
+            label=row["label"],
+            enabled=normalize_bool(row["enabled"]),
+            owner_user_id=row.get("owner_user_id") or None,
+        )
+
+    def _reservation_record(self, row: dict[str, Any]) -> ReservationRecord:
+        return ReservationRecord(
+            reservation_id=row["reservation_id"],
+            user_id=row["user_id"],
+            desk_id=row["desk_id"],
+            date=self._parse_date(row["date"]),
+            slot=row["slot"],
+            created_at=self._parse_datetime(row["created_at"]),
+            updated_at=self._parse_datetime(row["updated_at"]),
+            auto=False,
+            version=_row_version(row),
+        )
+
+    def _absence_record(self, row: dict[str, Any]) -> AbsenceRecord:
+        return AbsenceRecord(
+            absence_id=row["absence_id"],
+            owner_user_id=row["owner_user_id"],
+            desk_id=row["desk_id"],
+            date=self._parse_date(row["date"]),
+            slot=row["slot"],
+            created_at=self._parse_datetime(row["created_at"]),
+        )
+
     def _parse_date(self, raw: Any) -> date:
-        if isinstance(raw, date) and not isinstance(raw, datetime):
-            return raw
-        if isinstance(raw, datetime):
-            return raw.date()
-        return date.fromisoformat(str(raw))
+        return parse_date(raw)
 
     def _parse_datetime(self, raw: Any) -> datetime:
-        if isinstance(raw, datetime):
-            return raw
-        return datetime.fromisoformat(str(raw))
+        return parse_datetime(raw)
 
     def _normalize_user_name(self, row: dict[str, Any]) -> str:
-        name = str(row.get("name") or "").strip()
-        if name:
-            return name
-        email = str(row.get("email") or "").strip()
-        if "@" in email:
-            return email.split("@", 1)[0]
-        return email or "user"
+        return row_user_name(row)
+
+
+def _row_version(row: dict[str, Any]) -> int:
+    # Rows written before versioning existed count as version 1.
+    return int(row.get("version") or 1)
+
+
+def _revision_of(tables: Tables) -> int:
+    for row in tables.meta:
+        if row.get("key") == "revision":
+            try:
+                return int(row.get("value") or 0)
+            except (TypeError, ValueError):
+                return 0
+    return 0
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+try:  # optional: pip install "desk-reservation[brotli]"
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+ENCODING_BROTLI = "br"
+ENCODING_GZIP = "gzip"
+ENCODING_IDENTITY = "identity"
+
+
+def supported_encodings() -> tuple[str, ...]:
+    return (ENCODING_BROTLI, ENCODING_GZIP) if brotli is not None else (ENCODING_GZIP,)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str:
+    if not accept_encoding:
+        return ENCODING_IDENTITY
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best = ENCODING_IDENTITY
+    best_weight = 0.0
+    for encoding in supported_encodings():
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == ENCODING_BROTLI:
+        return brotli.compress(body, quality=5)
+    if encoding == ENCODING_GZIP:
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
+
+
+# Serialized (and compressed) response bodies keyed by ETag. The ETag already
+# pins the data version and query, so every client asking for the same view
+# reuses one serialization and one compression per encoding.
+class EncodedBodyCache:
+    def __init__(self, max_entries: int = 64, min_compress_bytes: int = 1024) -> None:
+        self.max_entries = max_entries
+        self.min_compress_bytes = min_compress_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, dict[str, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str, encoding: str) -> tuple[bytes, str] | None:
+        with self._lock:
+            variants = self._entries.get(etag)
+            if variants is None:
+                return None
+            self._entries.move_to_end(etag)
+            body = self._pick(variants, encoding)
+            if body is not None:
+                self.hits += 1
+            return body
+
+    def render(self, etag: str, encoding: str, produce: Callable[[], bytes]) -> tuple[bytes, str]:
+        cached = self.get(etag, encoding)
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.misses += 1
+            identity = self._entries.get(etag, {}).get(ENCODING_IDENTITY)
+        if identity is None:
+            identity = produce()
+        variants = {ENCODING_IDENTITY: identity}
+        if encoding != ENCODING_IDENTITY and len(identity) >= self.min_compress_bytes:
+            variants[encoding] = compress(identity, encoding)
+        with self._lock:
+            self._entries.setdefault(etag, {}).update(variants)
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return self._pick(self._entries[etag], encoding)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _pick(self, variants: dict[str, bytes], encoding: str) -> tuple[bytes, str] | None:
+        if encoding in variants:
+            return variants[encoding], encoding
+        identity = variants.get(ENCODING_IDENTITY)
+        # Too small to be worth compressing: identity is the answer.
+        if identity is not None and len(identity) < self.min_compress_bytes:
+            return identity, ENCODING_IDENTITY
+        return None
@@ -3,13 +3,13 @@ from __future__ import annotations
 import random
 import smtplib
 import ssl
-import uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from email.message import EmailMessage
 
 from app.config import settings
 from app.constants import ALLOWED_DOMAIN
+from app.sessions import MemorySessionStore, SessionStore, TTLCache, create_session_store
 
 
 @dataclass
@@ -19,16 +19,10 @@ class OTPState:
     attempts_left: int
 
 
-@dataclass
-class SessionState:
-    user_id: str
-    expires_at: datetime
-
-
 class AuthStore:
-    def __init__(self) -> None:
-        self._otp_by_email: dict[str, OTPState] = {}
-        self._sessions: dict[str, SessionState] = {}
+    def __init__(self, sessions: SessionStore | None = None) -> None:
+        self._otp_by_email: TTLCache[str, OTPState] = TTLCache(settings.session_max_entries)
+        self._sessions = sessions or create_session_store()
 
     def validate_email_domain(self, email: str) -> None:
         if not email.lower().endswith(ALLOWED_DOMAIN):
@@ -37,10 +31,14 @@ class AuthStore:
     def issue_otp(self, email: str) -> str:
         self.validate_email_domain(email)
         code = "".join(random.choice("0123456789") for _ in range(settings.otp_length))
-        self._otp_by_email[email.lower()] = OTPState(
-            code=code,
-            expires_at=datetime.utcnow() + timedelta(minutes=settings.otp_ttl_minutes),
-            attempts_left=settings.otp_max_attempts,
+        self._otp_by_email.set(
+            email.lower(),
+            OTPState(
+                code=code,
+                expires_at=datetime.utcnow() + timedelta(minutes=settings.otp_ttl_minutes),
+                attempts_left=settings.otp_max_attempts,
+            ),
+            ttl_seconds=settings.otp_ttl_minutes * 60,
         )
         return code
 
@@ -51,36 +49,30 @@ class AuthStore:
         if state is None:
             return False
         if datetime.utcnow() > state.expires_at:
-            self._otp_by_email.pop(key, None)
+            self._otp_by_email.pop(key)
             return False
         if state.attempts_left <= 0:
-            self._otp_by_email.pop(key, None)
+            self._otp_by_email.pop(key)
             return False
         if state.code != code:
             state.attempts_left -= 1
             return False
-        self._otp_by_email.pop(key, None)
+        self._otp_by_email.pop(key)
         return True
 
+    @property
+    def sessions_block(self) -> bool:
+        # Anything but the in-process store does I/O per lookup.
+        return not isinstance(self._sessions, MemorySessionStore)
+
     def create_session(self, user_id: str) -> str:
-        token = uuid.uuid4().hex
-        self._sessions[token] = SessionState(
-            user_id=user_id,
-            expires_at=datetime.utcnow() + timedelta(hours=settings.session_ttl_hours),
-        )
-        return token
+        return self._sessions.create(user_id, ttl_seconds=settings.session_ttl_hours * 3600)
 
     def get_session_user(self, token: str) -> str | None:
-        state = self._sessions.get(token)
-        if state is None:
-            return None
-        if datetime.utcnow() > state.expires_at:
-            self._sessions.pop(token, None)
-            return None
-        return state.user_id
+        return self._sessions.get(token)
 
     def logout(self, token: str) -> None:
-        self._sessions.pop(token, None)
+        self._sessions.delete(token)
 
 
 def send_otp_email(recipient: str, code: str) -> None:
@@ -1,19 +1,53 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Callable, Collection, TypeVar
 
 from fastapi import HTTPException, status
 
-from app.constants import SLOT_FULL
+from app.archive import partition_start
+from app.backups import BackupEntry, BackupStore
+from app.config import settings
+from app.constants import OP_CANCEL, OP_CREATE, OP_UPDATE, SLOT_FULL
 from app.domain import expand_request_slot, in_booking_window, is_workday
-from app.models import AbsenceRecord, DeskRecord, ReservationRecord, UserRecord
-from app.repository import ExcelRepository
+from app.events import EventBus
+from app.excel_bridge import export_workbook, import_workbook
+from app.executor import StorageExecutor
+from app.models import (
+    AbsenceRecord,
+    BootstrapResponse,
+    DeskRecord,
+    ReservationBatchItem,
+    ReservationRecord,
+    UserRecord,
+)
+from app.occupancy import OccupancyGrid, SlotKey
+from app.sessions import TTLCache
+from app.shared_state import COUNTER_DATA, COUNTER_USERS, SharedCounters
+from app.storage import Repository
+from app.store import ReservationOp, VersionConflictError
+
+T = TypeVar("T")
 
 
 @dataclass
 class ReservationService:
-    repo: ExcelRepository
+    repo: Repository
+    backups: BackupStore | None = None
+    io: StorageExecutor | None = None
+    events: EventBus = field(default_factory=EventBus)
+    counters: SharedCounters | None = None
+    principal_ttl_seconds: float = field(default_factory=lambda: settings.principal_ttl_seconds)
+    _principals: TTLCache[str, tuple[UserRecord, int]] = field(
+        default_factory=lambda: TTLCache(settings.session_max_entries), init=False, repr=False
+    )
+    _data_epoch_seen: int = field(default=0, init=False, repr=False)
+    _grid: OccupancyGrid | None = field(default=None, init=False, repr=False)
+    _grid_lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
 
     def list_users(self) -> list[UserRecord]:
         return [user for user in self.repo.list_users() if user.enabled]
@@ -27,7 +61,10 @@ class ReservationService:
             if not user.enabled:
                 raise HTTPException(status_code=403, detail="User disabled")
             return user
-        return self.repo.upsert_user(name=name, enabled=True, is_admin=False)
+        return self._write_through(
+            lambda: self.repo.upsert_user(name=name, enabled=True, is_admin=False),
+            lambda grid, _: None,
+        )
 
     def get_user_or_404(self, user_id: str) -> UserRecord:
         user = self.repo.get_user(user_id)
@@ -37,6 +74,31 @@ class ReservationService:
             raise HTTPException(status_code=403, detail="User disabled")
         return user
 
+    def cached_principal(self, user_id: str) -> UserRecord | None:
+        cached = self._principals.get(user_id)
+        # Another worker may have edited users since this entry was cached.
+        if cached is None or cached[1] != self._users_epoch():
+            return None
+        return cached[0]
+
+    def get_principal(self, user_id: str) -> UserRecord:
+        user = self.cached_principal(user_id)
+        if user is None:
+            epoch = self._users_epoch()
+            user = self.get_user_or_404(user_id)
+            self._principals.set(user_id, (user, epoch), self.principal_ttl_seconds)
+        return user
+
+    def sync_external_changes(self) -> bool:
+        if self.counters is None:
+            return False
+        epoch = self.counters.get(COUNTER_DATA)
+        if epoch == self._data_epoch_seen:
+            return False
+        self._data_epoch_seen = epoch
+        self.events.publish({"reload": True})
+        return True
+
     def list_effective_reservations(
         self,
         start_date: date | None = None,
@@ -45,45 +107,25 @@ class ReservationService:
         today = datetime.utcnow().date()
         start = start_date or today
         end = end_date or (today + timedelta(days=6))
-        explicit_rows = self.repo.list_reservations(start, end)
-        desks = [d for d in self.repo.list_desks() if d.enabled]
-        absences = self.repo.list_absences()
+        with self._grid_lock:
+            return self._occupancy(start, end).records(start, end)
 
-        explicit_index = {
-            (item.desk_id, item.date, item.slot): item for item in explicit_rows
-        }
-        absent_keys = {
-            (a.owner_user_id, a.desk_id, a.date, a.slot)
-            for a in absences
-            if start <= a.date <= end
-        }
-
-        result = list(explicit_rows)
-        cursor = start
-        while cursor <= end:
-            for desk in desks:
-                if not desk.owner_user_id:
-                    continue
-                for slot in ["AM", "PM"]:
-                    key = (desk.desk_id, cursor, slot)
-                    if key in explicit_index:
-                        continue
-                    if (desk.owner_user_id, desk.desk_id, cursor, slot) in absent_keys:
-                        continue
-                    result.append(
-                        ReservationRecord(
-                            reservation_id=f"auto-{desk.desk_id}-{cursor.isoformat()}-{slot}",
-                            user_id=desk.owner_user_id,
-                            desk_id=desk.desk_id,
-                            date=cursor,
-                            slot=slot,
-                            created_at=datetime.utcnow(),
-                            updated_at=datetime.utcnow(),
-                            auto=True,
-                        )
-                    )
-            cursor += timedelta(days=1)
-        return result
+    def bootstrap(
+        self,
+        user: UserRecord,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> BootstrapResponse:
+        # One snapshot for all four views. The grid lock comes first, the same
+        # order _write_through takes it before reading the repository.
+        with self._grid_lock, self.repo.read_snapshot():
+            return BootstrapResponse(
+                me=self.get_user_or_404(user.user_id),
+                users=self.list_users(),
+                desks=self.list_desks(),
+                reservations=self.list_effective_reservations(start_date, end_date),
+                version=self.repo.data_version(),
+            )
 
     def create_reservation(
         self,
@@ -92,27 +134,8 @@ class ReservationService:
         value_date: date,
         request_slot: str,
     ) -> list[ReservationRecord]:
-        slots = expand_request_slot(request_slot)
-        desk = self._get_enabled_desk_or_404(desk_id)
-        for slot in slots:
-            self._validate_date_slot(value_date, slot)
-            self._validate_named_desk_release(desk, user.user_id, value_date, slot)
-            self._validate_slot_conflicts(user.user_id, desk.desk_id, value_date, slot)
-
-        created: list[ReservationRecord] = []
-        for slot in slots:
-            try:
-                created.append(
-                    self.repo.create_reservation(
-                        user_id=user.user_id,
-                        desk_id=desk_id,
-                        value_date=value_date,
-                        slot=slot,
-                    )
-                )
-            except ValueError as exc:
-                raise HTTPException(status_code=409, detail=str(exc)) from exc
-        return created
+        ops = self._plan_create(user, desk_id, value_date, request_slot)
+        return [record for record in self._apply_ops(ops) if record is not None]
 
     def update_reservation(
         self,
@@ -121,42 +144,23 @@ class ReservationService:
         desk_id: str | None,
         value_date: date | None,
         request_slot: str | None,
+        expected_version: int | None = None,
     ) -> ReservationRecord:
-        existing = self.repo.get_reservation(reservation_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Reservation not found")
-        if existing.user_id != user.user_id and not user.is_admin:
-            raise HTTPException(status_code=403, detail="Cannot edit other users reservations")
-
-        if request_slot == SLOT_FULL:
-            raise HTTPException(
-                status_code=400,
-                detail="Patch supports AM or PM reservation records only",
-            )
-
-        target_desk_id = desk_id or existing.desk_id
-        target_date = value_date or existing.date
-        target_slot = request_slot or existing.slot
-        desk = self._get_enabled_desk_or_404(target_desk_id)
-
-        self._validate_date_slot(target_date, target_slot)
-        self._validate_named_desk_release(desk, existing.user_id, target_date, target_slot)
-        self._validate_slot_conflicts(
-            existing.user_id,
-            desk.desk_id,
-            target_date,
-            target_slot,
-            exclude_reservation_id=existing.reservation_id,
-        )
-
+        op = self._plan_update(user, reservation_id, desk_id, value_date, request_slot, (), expected_version)
         try:
-            updated = self.repo.update_reservation(
-                reservation_id=existing.reservation_id,
-                user_id=existing.user_id,
-                desk_id=target_desk_id,
-                value_date=target_date,
-                slot=target_slot,
+            updated = self._write_through(
+                lambda: self.repo.update_reservation(
+                    reservation_id=op.reservation_id,
+                    user_id=op.user_id,
+                    desk_id=op.desk_id,
+                    value_date=op.date,
+                    slot=op.slot,
+                    expected_version=op.expected_version,
+                ),
+                lambda grid, record: grid.put_reservation(record) if record else [],
             )
+        except VersionConflictError as exc:
+            raise self._version_conflict(exc, expected_version) from exc
         except ValueError as exc:
             raise HTTPException(status_code=409, detail=str(exc)) from exc
         if not updated:
@@ -164,15 +168,37 @@ class ReservationService:
         return updated
 
     def cancel_reservation(self, actor: UserRecord, reservation_id: str) -> None:
-        reservation = self.repo.get_reservation(reservation_id)
-        if not reservation:
-            raise HTTPException(status_code=404, detail="Reservation not found")
-        if reservation.user_id != actor.user_id and not actor.is_admin:
-            raise HTTPException(status_code=403, detail="Cannot cancel other users reservations")
-        deleted = self.repo.delete_reservation(reservation_id)
+        self._plan_cancel(actor, reservation_id)
+        deleted = self._delete_reservation(reservation_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Reservation not found")
 
+    def apply_batch(self, user: UserRecord, items: list[ReservationBatchItem]) -> list[ReservationRecord]:
+        if not items:
+            raise HTTPException(status_code=400, detail="Batch is empty")
+        # Reservations the batch moves or cancels no longer block other items;
+        # conflicts between items themselves are caught by the repository.
+        moved = {item.reservation_id for item in items if item.action != OP_CREATE and item.reservation_id}
+        ops: list[ReservationOp] = []
+        for item in items:
+            if item.action == OP_CREATE:
+                if not item.desk_id or not item.date or not item.slot:
+                    raise HTTPException(status_code=400, detail="Create requires desk_id, date and slot")
+                ops.extend(self._plan_create(user, item.desk_id, item.date, item.slot, moved))
+                continue
+            if not item.reservation_id:
+                raise HTTPException(status_code=400, detail=f"{item.action.capitalize()} requires reservation_id")
+            if item.action == OP_UPDATE:
+                ops.append(
+                    self._plan_update(
+                        user, item.reservation_id, item.desk_id, item.date, item.slot, moved, item.version
+                    )
+                )
+            else:
+                ops.append(self._plan_cancel(user, item.reservation_id))
+        pinned = next((item.version for item in items if item.version is not None), None)
+        return [record for record in self._apply_ops(ops, pinned) if record is not None]
+
     def upsert_absence(
         self,
         owner: UserRecord,
@@ -187,18 +213,27 @@ class ReservationService:
         slots = expand_request_slot(request_slot)
         for slot in slots:
             self._validate_date_slot(value_date, slot)
-            self.repo.upsert_absence(
-                owner_user_id=owner.user_id,
-                desk_id=desk_id,
-                value_date=value_date,
-                slot=slot,
-                released=released,
+            self._write_through(
+                lambda slot=slot: self.repo.upsert_absence(
+                    owner_user_id=owner.user_id,
+                    desk_id=desk_id,
+                    value_date=value_date,
+                    slot=slot,
+                    released=released,
+                ),
+                lambda grid, _, slot=slot: grid.set_released(owner.user_id, desk_id, value_date, slot, released),
             )
         return [a for a in self.repo.list_absences() if a.owner_user_id == owner.user_id]
 
     def admin_upsert_user(self, actor: UserRecord, name: str, enabled: bool, is_admin: bool) -> UserRecord:
         self._require_admin(actor)
-        return self.repo.upsert_user(name=name, enabled=enabled, is_admin=is_admin)
+        updated = self._write_through(
+            lambda: self.repo.upsert_user(name=name, enabled=enabled, is_admin=is_admin),
+            lambda grid, _: None,
+        )
+        self._principals.pop(updated.user_id)
+        self._bump_users_epoch()
+        return updated
 
     def admin_upsert_desk(
         self,
@@ -211,16 +246,19 @@ class ReservationService:
         self._require_admin(actor)
         if owner_user_id and not self.repo.get_user(owner_user_id):
             raise HTTPException(status_code=404, detail="Desk owner user not found")
-        return self.repo.upsert_desk(
-            label=label,
-            enabled=enabled,
-            owner_user_id=owner_user_id,
-            desk_id=desk_id,
+        return self._write_through(
+            lambda: self.repo.upsert_desk(
+                label=label,
+                enabled=enabled,
+                owner_user_id=owner_user_id,
+                desk_id=desk_id,
+            ),
+            OccupancyGrid.put_desk,
         )
 
     def admin_force_cancel(self, actor: UserRecord, reservation_id: str) -> None:
         self._require_admin(actor)
-        deleted = self.repo.delete_reservation(reservation_id)
+        deleted = self._delete_reservation(reservation_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Reservation not found")
 
@@ -228,6 +266,241 @@ class ReservationService:
         self._require_admin(actor)
         return self.repo.stats()
 
+    def admin_reservation_history(self, actor: UserRecord, start_date: date, end_date: date) -> list[ReservationRecord]:
+        self._require_admin(actor)
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+        return self.repo.list_reservation_history(start_date, end_date)
+
+    def archive_past(self) -> int:
+        # Everything before the current partition is closed; the live store
+        # keeps only the current and upcoming partitions.
+        cutoff = partition_start(datetime.utcnow().date(), settings.archive_partition)
+        # Archived rows all predate today, so no cached slot changes.
+        return self._write_through(lambda: self.repo.archive_before(cutoff), lambda grid, _: [])
+
+    def admin_export(self, actor: UserRecord) -> Path:
+        self._require_admin(actor)
+        return export_workbook(self.repo, settings.export_file)
+
+    def admin_import(self, actor: UserRecord, payload: bytes) -> dict[str, int]:
+        self._require_admin(actor)
+        if not payload:
+            raise HTTPException(status_code=400, detail="Workbook upload is empty")
+        with TemporaryDirectory() as tmp:
+            source = Path(tmp) / "import.xlsx"
+            source.write_bytes(payload)
+            try:
+                return self._import(source)
+            except (KeyError, ValueError, OSError) as exc:
+                raise HTTPException(status_code=400, detail=f"Invalid workbook: {exc}") from exc
+
+    def admin_io_metrics(self, actor: UserRecord) -> dict[str, dict[str, float]]:
+        self._require_admin(actor)
+        return self.io.metrics() if self.io is not None else {}
+
+    def admin_list_backups(self, actor: UserRecord) -> list[BackupEntry]:
+        self._require_admin(actor)
+        if self.backups is None:
+            return []
+        return self.backups.list_backups()
+
+    def admin_restore_backup(self, actor: UserRecord, backup_id: str) -> dict[str, int]:
+        self._require_admin(actor)
+        if self.backups is None:
+            raise HTTPException(status_code=404, detail="Backup not found")
+        with TemporaryDirectory() as tmp:
+            try:
+                source = self.backups.materialize(backup_id, Path(tmp) / "restore.xlsx")
+            except KeyError as exc:
+                raise HTTPException(status_code=404, detail="Backup not found") from exc
+            return self._import(source)
+
+    def _plan_create(
+        self,
+        user: UserRecord,
+        desk_id: str,
+        value_date: date,
+        request_slot: str,
+        exclude_reservation_ids: Collection[str] = (),
+    ) -> list[ReservationOp]:
+        slots = expand_request_slot(request_slot)
+        desk = self._get_enabled_desk_or_404(desk_id)
+        for slot in slots:
+            self._validate_date_slot(value_date, slot)
+        self._validate_slot_conflicts(user.user_id, desk, value_date, slots, exclude_reservation_ids)
+        return [
+            ReservationOp(OP_CREATE, user_id=user.user_id, desk_id=desk_id, date=value_date, slot=slot)
+            for slot in slots
+        ]
+
+    def _plan_update(
+        self,
+        user: UserRecord,
+        reservation_id: str,
+        desk_id: str | None,
+        value_date: date | None,
+        request_slot: str | None,
+        exclude_reservation_ids: Collection[str] = (),
+        expected_version: int | None = None,
+    ) -> ReservationOp:
+        existing = self.repo.get_reservation(reservation_id)
+        if not existing:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        if existing.user_id != user.user_id and not user.is_admin:
+            raise HTTPException(status_code=403, detail="Cannot edit other users reservations")
+        if expected_version is not None and existing.version != expected_version:
+            raise self._version_conflict(None, expected_version)
+
+        if request_slot == SLOT_FULL:
+            raise HTTPException(
+                status_code=400,
+                detail="Patch supports AM or PM reservation records only",
+            )
+
+        target_desk_id = desk_id or existing.desk_id
+        target_date = value_date or existing.date
+        target_slot = request_slot or existing.slot
+        desk = self._get_enabled_desk_or_404(target_desk_id)
+
+        self._validate_date_slot(target_date, target_slot)
+        self._validate_slot_conflicts(
+            existing.user_id,
+            desk,
+            target_date,
+            [target_slot],
+            {existing.reservation_id, *exclude_reservation_ids},
+        )
+        return ReservationOp(
+            OP_UPDATE,
+            reservation_id=existing.reservation_id,
+            user_id=existing.user_id,
+            desk_id=target_desk_id,
+            date=target_date,
+            slot=target_slot,
+            # Pin the version validated above so a concurrent edit is rejected.
+            expected_version=existing.version,
+        )
+
+    def _plan_cancel(self, actor: UserRecord, reservation_id: str) -> ReservationOp:
+        reservation = self.repo.get_reservation(reservation_id)
+        if not reservation:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        if reservation.user_id != actor.user_id and not actor.is_admin:
+            raise HTTPException(status_code=403, detail="Cannot cancel other users reservations")
+        return ReservationOp(OP_CANCEL, reservation_id=reservation_id)
+
+    def _apply_ops(
+        self,
+        ops: list[ReservationOp],
+        expected_version: int | None = None,
+    ) -> list[ReservationRecord | None]:
+        def patch(grid: OccupancyGrid, results: list[ReservationRecord | None]) -> list[SlotKey]:
+            touched: list[SlotKey] = []
+            for op, record in zip(ops, results):
+                if record is None:
+                    touched.extend(grid.drop_reservation(op.reservation_id))
+                else:
+                    touched.extend(grid.put_reservation(record))
+            return touched
+
+        try:
+            return self._write_through(lambda: self.repo.apply_reservation_ops(ops), patch)
+        except LookupError as exc:
+            raise HTTPException(status_code=404, detail=str(exc.args[0])) from exc
+        except VersionConflictError as exc:
+            raise self._version_conflict(exc, expected_version) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+    def _import(self, source: Path) -> dict[str, int]:
+        try:
+            return self._write_through(lambda: import_workbook(self.repo, source), lambda grid, _: None)
+        finally:
+            # Any user may have been disabled or demoted by the import.
+            self._principals.clear()
+            self._bump_users_epoch()
+
+    def _version_conflict(self, exc: VersionConflictError | None, expected_version: int | None) -> HTTPException:
+        detail = str(exc) if exc else "Reservation was modified by someone else"
+        # 412 answers an explicit If-Match; otherwise the race was ours to lose.
+        if expected_version is not None:
+            return HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=detail)
+        return HTTPException(status_code=409, detail=detail)
+
+    def _occupancy(self, start: date, end: date) -> OccupancyGrid:
+        today = datetime.utcnow().date()
+        window_end = today + timedelta(days=6)
+        state = self.repo.data_state()
+        if not (today <= start and end <= window_end):
+            return OccupancyGrid.build(self.repo, start, end, state)
+        grid = self._grid
+        if grid is None or grid.start != today or grid.tag != state.tag:
+            grid = OccupancyGrid.build(self.repo, today, window_end, state)
+            self._grid = grid
+        return grid
+
+    def _write_through(
+        self,
+        write: Callable[[], T],
+        patch: Callable[[OccupancyGrid, T], list[SlotKey] | None],
+    ) -> T:
+        before = self.repo.data_state()
+        result = write()
+        with self._grid_lock:
+            after = self.repo.data_state()
+            if after.tag == before.tag:
+                return result
+            grid = self._grid
+            touched: list[SlotKey] | None = None
+            # Only patch when this write is the sole change since the grid was
+            # built; anything else (e.g. another worker) forces a rebuild.
+            if grid is not None and grid.tag == before.tag and after.revision == before.revision + 1:
+                touched = patch(grid, result)
+                grid.version = after.revision
+                grid.tag = after.tag
+            version = after.revision
+            if touched is None:
+                event = {"version": version, "reload": True}
+            else:
+                event = {"version": version, "slots": [self._slot_event(grid, key) for key in dict.fromkeys(touched)]}
+        self._bump_data_epoch()
+        self.events.publish(event)
+        return result
+
+    def _bump_data_epoch(self) -> None:
+        if self.counters is None:
+            return
+        previous = self._data_epoch_seen
+        epoch = self.counters.bump(COUNTER_DATA)
+        # Only skip ahead if no other worker bumped in between; otherwise
+        # sync_external_changes still has their change to announce.
+        if epoch == previous + 1:
+            self._data_epoch_seen = epoch
+
+    def _users_epoch(self) -> int:
+        return self.counters.get(COUNTER_USERS) if self.counters is not None else 0
+
+    def _bump_users_epoch(self) -> None:
+        if self.counters is not None:
+            self.counters.bump(COUNTER_USERS)
+
+    def _slot_event(self, grid: OccupancyGrid, key: SlotKey) -> dict[str, object]:
+        value_date, slot, desk_id = key
+        holder = grid.desk_holder(value_date, slot, desk_id)
+        return {
+            "date": value_date.isoformat(),
+            "slot": slot,
+            "desk_id": desk_id,
+            "reservation": holder.model_dump(mode="json") if holder else None,
+        }
+
+    def _delete_reservation(self, reservation_id: str) -> bool:
+        return self._write_through(
+            lambda: self.repo.delete_reservation(reservation_id),
+            lambda grid, _: grid.drop_reservation(reservation_id),
+        )
+
     def _require_admin(self, user: UserRecord) -> None:
         if not user.is_admin:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin required")
@@ -248,43 +521,50 @@ class ReservationService:
         if slot not in {"AM", "PM"}:
             raise HTTPException(status_code=400, detail="Unsupported slot")
 
-    def _validate_named_desk_release(
+    def find_conflicts(
         self,
+        user_id: str,
         desk: DeskRecord,
-        requester_user_id: str,
         value_date: date,
-        slot: str,
-    ) -> None:
-        if not desk.owner_user_id:
-            return
-        if desk.owner_user_id == requester_user_id:
-            return
-        absences = self.repo.list_absences()
-        released = any(
-            item.owner_user_id == desk.owner_user_id
-            and item.desk_id == desk.desk_id
-            and item.date == value_date
-            and item.slot == slot
-            for item in absences
-        )
-        if not released:
-            raise HTTPException(status_code=409, detail="Named desk is not released by owner")
+        slots: list[str],
+        exclude_reservation_ids: Collection[str] = (),
+    ) -> dict[str, list[str]]:
+        conflicts: dict[str, list[str]] = {}
+        with self._grid_lock:
+            grid = self._occupancy(value_date, value_date)
+            for slot in slots:
+                reasons: list[str] = []
+                owner = desk.owner_user_id
+                if owner and owner != user_id and not grid.is_released(owner, desk.desk_id, value_date, slot):
+                    reasons.append("Named desk is not released by owner")
+                else:
+                    holder = grid.desk_holder(value_date, slot, desk.desk_id)
+                    if holder is not None and holder.reservation_id not in exclude_reservation_ids:
+                        reasons.append("Desk already reserved")
+                holdings = [
+                    item
+                    for item in grid.user_holdings(value_date, slot, user_id)
+                    if item.reservation_id not in exclude_reservation_ids and item.desk_id != desk.desk_id
+                ]
+                if holdings:
+                    reasons.append("User already has a desk in this slot")
+                if reasons:
+                    conflicts[slot] = reasons
+        return conflicts
 
     def _validate_slot_conflicts(
         self,
         user_id: str,
-        desk_id: str,
+        desk: DeskRecord,
         value_date: date,
-        slot: str,
-        exclude_reservation_id: str | None = None,
+        slots: list[str],
+        exclude_reservation_ids: Collection[str] = (),
     ) -> None:
-        effective = self.list_effective_reservations(start_date=value_date, end_date=value_date)
-        for item in effective:
-            if item.reservation_id == exclude_reservation_id:
-                continue
-            if item.date != value_date or item.slot != slot:
-                continue
-            if item.desk_id == desk_id:
-                raise HTTPException(status_code=409, detail="Desk already reserved")
-            if item.user_id == user_id:
-                raise HTTPException(status_code=409, detail="User already has a desk in this slot")
+        conflicts = self.find_conflicts(user_id, desk, value_date, slots, exclude_reservation_ids)
+        if not conflicts:
+            return
+        if len(slots) == 1:
+            detail = "; ".join(conflicts[slots[0]])
+        else:
+            detail = "; ".join(f"{slot}: {reason}" for slot, reasons in conflicts.items() for reason in reasons)
+        raise HTTPException(status_code=409, detail=detail)
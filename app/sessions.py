@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Generic, Hashable, Iterator, Protocol, TypeVar
+
+from app.config import settings
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+SESSION_BACKEND_MEMORY = "memory"
+SESSION_BACKEND_SQLITE = "sqlite"
+
+
+# Dict with per-entry expiry. A min-heap of expiry times lets every write sweep
+# whatever has expired in O(log n) per entry, so dead entries never pile up;
+# past ``max_size`` the entries closest to expiry are evicted first.
+class TTLCache(Generic[K, V]):
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.time) -> None:
+        self.max_size = max(1, max_size)
+        self.clock = clock
+        self._items: dict[K, tuple[float, V]] = {}
+        self._heap: list[tuple[float, int, K]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def set(self, key: K, value: V, ttl_seconds: float) -> None:
+        now = self.clock()
+        expires_at = now + ttl_seconds
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            heapq.heappush(self._heap, (expires_at, next(self._counter), key))
+            self._sweep(now)
+            while len(self._items) > self.max_size:
+                self._pop_earliest()
+            # Heap entries for overwritten or removed keys are dropped lazily;
+            # rebuild once they dominate.
+            if len(self._heap) > 2 * len(self._items) + 64:
+                self._heap = [(exp, next(self._counter), k) for k, (exp, _) in self._items.items()]
+                heapq.heapify(self._heap)
+
+    def get(self, key: K) -> V | None:
+        now = self.clock()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] <= now:
+                del self._items[key]
+                return None
+            return item[1]
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            item = self._items.pop(key, None)
+        return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._heap.clear()
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep(self.clock())
+
+    def _sweep(self, now: float) -> int:
+        removed = 0
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(self._heap)
+            item = self._items.get(key)
+            if item is not None and item[0] == expires_at:
+                del self._items[key]
+                removed += 1
+        return removed
+
+    def _pop_earliest(self) -> None:
+        while self._heap:
+            expires_at, _, key = heapq.heappop(self._heap)
+            item = self._items.get(key)
+            if item is not None and item[0] == expires_at:
+                del self._items[key]
+                return
+
+
+class SessionStore(Protocol):
+    def create(self, user_id: str, ttl_seconds: float) -> str: ...
+
+    def get(self, token: str) -> str | None: ...
+
+    def delete(self, token: str) -> None: ...
+
+
+class MemorySessionStore:
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.time) -> None:
+        self._sessions: TTLCache[str, str] = TTLCache(max_size, clock)
+
+    def create(self, user_id: str, ttl_seconds: float) -> str:
+        token = uuid.uuid4().hex
+        self._sessions.set(token, user_id, ttl_seconds)
+        return token
+
+    def get(self, token: str) -> str | None:
+        return self._sessions.get(token)
+
+    def delete(self, token: str) -> None:
+        self._sessions.pop(token)
+
+
+# Sessions in a local SQLite file so restarts and multiple worker processes
+# share them. Expired rows are deleted at most every ``sweep_interval_seconds``.
+class SqliteSessionStore:
+    def __init__(self, db_file: Path, sweep_interval_seconds: float = 60.0) -> None:
+        self.db_file = db_file
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._last_sweep = 0.0
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "token TEXT PRIMARY KEY, user_id TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires_at)")
+
+    def create(self, user_id: str, ttl_seconds: float) -> str:
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sessions (token, user_id, expires_at) VALUES (?, ?, ?)",
+                (token, user_id, now + ttl_seconds),
+            )
+            if now - self._last_sweep >= self.sweep_interval_seconds:
+                self._last_sweep = now
+                conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        return token
+
+    def get(self, token: str) -> str | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT user_id FROM sessions WHERE token = ? AND expires_at > ?",
+                (token, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def delete(self, token: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_file, timeout=30.0, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def create_session_store(backend: str | None = None) -> SessionStore:
+    name = (backend or settings.session_backend).strip().lower()
+    if name == SESSION_BACKEND_MEMORY:
+        return MemorySessionStore(max_size=settings.session_max_entries)
+    if name == SESSION_BACKEND_SQLITE:
+        return SqliteSessionStore(settings.session_file)
+    raise ValueError(f"Unsupported session backend: {name}")
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+from filelock import FileLock
+
+COUNTER_DATA = "data"
+COUNTER_USERS = "users"
+COUNTERS = (COUNTER_DATA, COUNTER_USERS)
+_SLOT = struct.Struct("<Q")
+
+
+# Monotonic counters in a small memory-mapped file shared by every worker
+# process on the host. Reads are a plain memory access; bumps serialize on a
+# file lock. Workers compare a counter against the value they last saw to
+# learn that another process changed something.
+class SharedCounters:
+    def __init__(self, path: Path, names: tuple[str, ...] = COUNTERS) -> None:
+        self.path = path
+        self._offsets = {name: index * _SLOT.size for index, name in enumerate(names)}
+        self._size = len(names) * _SLOT.size
+        self._mmap: mmap.mmap | None = None
+        self._map_lock = threading.Lock()
+
+    def get(self, name: str) -> int:
+        return _SLOT.unpack_from(self._map(), self._offsets[name])[0]
+
+    def bump(self, name: str) -> int:
+        mapped = self._map()
+        with self._file_lock():
+            value = _SLOT.unpack_from(mapped, self._offsets[name])[0] + 1
+            _SLOT.pack_into(mapped, self._offsets[name], value)
+        return value
+
+    def close(self) -> None:
+        with self._map_lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+    def _map(self) -> mmap.mmap:
+        if self._mmap is not None:
+            return self._mmap
+        with self._map_lock:
+            if self._mmap is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self._file_lock():
+                    with self.path.open("ab") as handle:
+                        if handle.tell() < self._size:
+                            handle.write(b"\0" * (self._size - handle.tell()))
+                fd = os.open(self.path, os.O_RDWR)
+                try:
+                    self._mmap = mmap.mmap(fd, self._size)
+                finally:
+                    os.close(fd)
+            return self._mmap
+
+    def _file_lock(self) -> FileLock:
+        return FileLock(str(self.path) + ".lock")
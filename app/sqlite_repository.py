@@ -0,0 +1,602 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Iterator
+
+from app.archive import ReservationArchive
+from app.config import settings
+from app.constants import (
+    ABSENCES_HEADERS,
+    DESKS_HEADERS,
+    META_HEADERS,
+    OP_CANCEL,
+    OP_CREATE,
+    OP_UPDATE,
+    RESERVATIONS_HEADERS,
+    USERS_HEADERS,
+)
+from app.domain import normalize_bool, parse_date, parse_datetime
+from app.models import AbsenceRecord, DeskRecord, ReservationRecord, UserRecord
+from app.storage import DataState
+from app.store import ReservationOp, Tables, VersionConflictError, row_user_name
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    email TEXT,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    is_admin INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_users_name_key ON users (name_key);
+CREATE INDEX IF NOT EXISTS ix_users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS desks (
+    desk_id TEXT PRIMARY KEY,
+    label TEXT NOT NULL,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    owner_user_id TEXT
+);
+
+CREATE TABLE IF NOT EXISTS reservations (
+    reservation_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    desk_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    CONSTRAINT uq_reservations_desk_slot UNIQUE (desk_id, date, slot),
+    CONSTRAINT uq_reservations_user_slot UNIQUE (user_id, date, slot)
+);
+CREATE INDEX IF NOT EXISTS ix_reservations_date ON reservations (date, slot);
+
+CREATE TABLE IF NOT EXISTS absences (
+    absence_id TEXT PRIMARY KEY,
+    owner_user_id TEXT NOT NULL,
+    desk_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_absences_key ON absences (owner_user_id, desk_id, date, slot);
+CREATE INDEX IF NOT EXISTS ix_absences_date ON absences (date);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SqliteRepository:
+    def __init__(self) -> None:
+        self.db_file = settings.sqlite_file
+        self.archive = ReservationArchive(settings.archive_dir, settings.archive_partition)
+        self.busy_timeout_seconds = 30.0
+        self._pinned = threading.local()
+
+    def init_storage(self) -> None:
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(reservations)")}
+            if "version" not in columns:
+                conn.execute("ALTER TABLE reservations ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    def list_users(self) -> list[UserRecord]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM users ORDER BY rowid").fetchall()
+        return [self._user_record(row) for row in rows]
+
+    def get_user_by_name(self, name: str) -> UserRecord | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM users WHERE name_key = ? ORDER BY rowid LIMIT 1",
+                (name.strip().lower(),),
+            ).fetchone()
+        return self._user_record(row) if row else None
+
+    def get_user_by_email(self, email: str) -> UserRecord | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM users WHERE email = ? ORDER BY rowid LIMIT 1",
+                (email.strip().lower(),),
+            ).fetchone()
+        return self._user_record(row) if row else None
+
+    def get_user(self, user_id: str) -> UserRecord | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return self._user_record(row) if row else None
+
+    def upsert_user(
+        self,
+        name: str,
+        enabled: bool = True,
+        is_admin: bool = False,
+        email: str | None = None,
+    ) -> UserRecord:
+        now = datetime.utcnow().isoformat()
+        normalized_name = name.strip()
+        normalized_email = email.lower().strip() if email else None
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT user_id FROM users WHERE name_key = ? ORDER BY rowid LIMIT 1",
+                (normalized_name.lower(),),
+            ).fetchone()
+            if row:
+                user_id = row["user_id"]
+                conn.execute(
+                    "UPDATE users SET name = ?, name_key = ?, email = COALESCE(?, email), "
+                    "enabled = ?, is_admin = ? WHERE user_id = ?",
+                    (normalized_name, normalized_name.lower(), normalized_email, enabled, is_admin, user_id),
+                )
+            else:
+                user_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO users (user_id, name, name_key, email, enabled, is_admin, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, normalized_name, normalized_name.lower(), normalized_email, enabled, is_admin, now),
+                )
+            saved = conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return self._user_record(saved)
+
+    def list_desks(self) -> list[DeskRecord]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM desks ORDER BY rowid").fetchall()
+        return [self._desk_record(row) for row in rows]
+
+    def upsert_desk(
+        self,
+        label: str,
+        enabled: bool = True,
+        owner_user_id: str | None = None,
+        desk_id: str | None = None,
+    ) -> DeskRecord:
+        target_id = desk_id or uuid.uuid4().hex
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO desks (desk_id, label, enabled, owner_user_id) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (desk_id) DO UPDATE SET label = excluded.label, "
+                "enabled = excluded.enabled, owner_user_id = excluded.owner_user_id",
+                (target_id, label, enabled, owner_user_id),
+            )
+            saved = conn.execute("SELECT * FROM desks WHERE desk_id = ?", (target_id,)).fetchone()
+        return self._desk_record(saved)
+
+    def get_desk(self, desk_id: str) -> DeskRecord | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM desks WHERE desk_id = ?", (desk_id,)).fetchone()
+        return self._desk_record(row) if row else None
+
+    def list_reservations(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> list[ReservationRecord]:
+        query = "SELECT * FROM reservations WHERE 1 = 1"
+        params: list[str] = []
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date.isoformat())
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date.isoformat())
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY date, slot, desk_id", params).fetchall()
+        return [self._reservation_record(row) for row in rows]
+
+    def get_reservation(self, reservation_id: str) -> ReservationRecord | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM reservations WHERE reservation_id = ?",
+                (reservation_id,),
+            ).fetchone()
+        return self._reservation_record(row) if row else None
+
+    def create_reservation(self, user_id: str, desk_id: str, value_date: date, slot: str) -> ReservationRecord:
+        now = datetime.utcnow().isoformat()
+        with self._transaction() as conn:
+            saved = self._insert_reservation(conn, user_id, desk_id, value_date, slot, now)
+        return self._reservation_record(saved)
+
+    def update_reservation(
+        self,
+        reservation_id: str,
+        user_id: str,
+        desk_id: str,
+        value_date: date,
+        slot: str,
+        expected_version: int | None = None,
+    ) -> ReservationRecord | None:
+        now = datetime.utcnow().isoformat()
+        with self._transaction() as conn:
+            saved = self._update_reservation(
+                conn, reservation_id, user_id, desk_id, value_date, slot, now, expected_version
+            )
+        return self._reservation_record(saved) if saved else None
+
+    def delete_reservation(self, reservation_id: str) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute("DELETE FROM reservations WHERE reservation_id = ?", (reservation_id,))
+        return cursor.rowcount > 0
+
+    def apply_reservation_ops(self, ops: list[ReservationOp]) -> list[ReservationRecord | None]:
+        now = datetime.utcnow().isoformat()
+        results: list[sqlite3.Row | None] = []
+        with self._transaction() as conn:
+            for op in ops:
+                if op.action == OP_CREATE:
+                    results.append(self._insert_reservation(conn, op.user_id, op.desk_id, op.date, op.slot, now))
+                elif op.action == OP_UPDATE:
+                    saved = self._update_reservation(
+                        conn, op.reservation_id, op.user_id, op.desk_id, op.date, op.slot, now, op.expected_version
+                    )
+                    if saved is None:
+                        raise LookupError("Reservation not found")
+                    results.append(saved)
+                elif op.action == OP_CANCEL:
+                    cursor = conn.execute(
+                        "DELETE FROM reservations WHERE reservation_id = ?",
+                        (op.reservation_id,),
+                    )
+                    if cursor.rowcount == 0:
+                        raise LookupError("Reservation not found")
+                    results.append(None)
+                else:
+                    raise ValueError(f"Unsupported batch action: {op.action}")
+        return [self._reservation_record(row) if row else None for row in results]
+
+    def list_absences(self) -> list[AbsenceRecord]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM absences ORDER BY rowid").fetchall()
+        return [self._absence_record(row) for row in rows]
+
+    def upsert_absence(
+        self,
+        owner_user_id: str,
+        desk_id: str,
+        value_date: date,
+        slot: str,
+        released: bool,
+    ) -> None:
+        key = (owner_user_id, desk_id, value_date.isoformat(), slot)
+        with self._transaction() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM absences WHERE owner_user_id = ? AND desk_id = ? AND date = ? AND slot = ? LIMIT 1",
+                key,
+            ).fetchone()
+            if released and not exists:
+                conn.execute(
+                    "INSERT INTO absences (absence_id, owner_user_id, desk_id, date, slot, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (uuid.uuid4().hex, *key, datetime.utcnow().isoformat()),
+                )
+            if not released and exists:
+                conn.execute(
+                    "DELETE FROM absences WHERE owner_user_id = ? AND desk_id = ? AND date = ? AND slot = ?",
+                    key,
+                )
+
+    def list_reservation_history(self, start_date: date, end_date: date) -> list[ReservationRecord]:
+        archived = {
+            row["reservation_id"]: self._reservation_record(row)
+            for row in self.archive.query("reservations", start_date, end_date)
+        }
+        archived.update((record.reservation_id, record) for record in self.list_reservations(start_date, end_date))
+        return sorted(archived.values(), key=lambda record: (record.date, record.slot, record.desk_id))
+
+    def archive_before(self, cutoff: date) -> int:
+        with self._transaction() as conn:
+            reservations = self._select_rows(conn, "reservations", RESERVATIONS_HEADERS, "date < ?", cutoff.isoformat())
+            absences = self._select_rows(conn, "absences", ABSENCES_HEADERS, "date < ?", cutoff.isoformat())
+            # Archive inside the transaction: a failure rolls the deletes back.
+            self.archive.append("reservations", reservations)
+            self.archive.append("absences", absences)
+            conn.execute("DELETE FROM reservations WHERE date < ?", (cutoff.isoformat(),))
+            conn.execute("DELETE FROM absences WHERE date < ?", (cutoff.isoformat(),))
+        return len(reservations) + len(absences)
+
+    def stats(self) -> dict[str, int]:
+        with self._connect() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM reservations").fetchone()[0]
+            users = conn.execute("SELECT COUNT(*) FROM users WHERE enabled").fetchone()[0]
+            desks = conn.execute("SELECT COUNT(*) FROM desks WHERE enabled").fetchone()[0]
+        return {
+            "total_reservations": total,
+            "active_users": users,
+            "enabled_desks": desks,
+        }
+
+    def data_version(self) -> int:
+        with self._connect() as conn:
+            return self._revision(conn)
+
+    def data_state(self) -> DataState:
+        # Every change to the database goes through a revision bump.
+        revision = self.data_version()
+        return DataState(revision=revision, tag=str(revision))
+
+    @contextmanager
+    def read_snapshot(self) -> Iterator[None]:
+        # Reads on this thread share one connection and one read transaction;
+        # under WAL it sees the database as of its first statement.
+        if getattr(self._pinned, "conn", None) is not None:
+            yield
+            return
+        with self._open() as conn:
+            conn.execute("BEGIN")
+            try:
+                self._revision(conn)
+                self._pinned.conn = conn
+                yield
+            finally:
+                self._pinned.conn = None
+                conn.execute("ROLLBACK")
+
+    def snapshot_tables(self) -> Tables:
+        with self._connect() as conn:
+            return Tables(
+                users=self._select_rows(conn, "users", USERS_HEADERS),
+                desks=self._select_rows(conn, "desks", DESKS_HEADERS),
+                reservations=self._select_rows(conn, "reservations", RESERVATIONS_HEADERS),
+                absences=self._select_rows(conn, "absences", ABSENCES_HEADERS),
+                meta=self._select_rows(conn, "meta", META_HEADERS),
+            )
+
+    def replace_tables(self, tables: Tables) -> None:
+        now = datetime.utcnow().isoformat()
+        users = [
+            {
+                **row,
+                "name": row_user_name(row),
+                "name_key": row_user_name(row).lower(),
+                "email": str(row["email"]).strip().lower() if row.get("email") else None,
+                "enabled": normalize_bool(row.get("enabled")),
+                "is_admin": normalize_bool(row.get("is_admin")),
+                "created_at": row.get("created_at") or now,
+            }
+            for row in tables.users
+            if row.get("user_id")
+        ]
+        desks = [
+            {**row, "label": row.get("label") or "", "enabled": normalize_bool(row.get("enabled"))}
+            for row in tables.desks
+            if row.get("desk_id")
+        ]
+        reservations = [
+            {**row, "date": parse_date(row["date"]).isoformat(), "version": int(row.get("version") or 1)}
+            for row in tables.reservations
+            if row.get("reservation_id")
+        ]
+        absences = [
+            {**row, "date": parse_date(row["date"]).isoformat()}
+            for row in tables.absences
+            if row.get("absence_id")
+        ]
+        imported_revision = 0
+        for row in tables.meta:
+            if row.get("key") == "revision":
+                imported_revision = int(row.get("value") or 0)
+        meta = [row for row in tables.meta if row.get("key") and row.get("key") != "revision"]
+        with self._transaction() as conn:
+            meta.append({"key": "revision", "value": max(self._revision(conn), imported_revision)})
+            for name in ("users", "desks", "reservations", "absences", "meta"):
+                conn.execute(f"DELETE FROM {name}")
+            try:
+                self._insert_rows(conn, "users", [*USERS_HEADERS, "name_key"], users)
+                self._insert_rows(conn, "desks", DESKS_HEADERS, desks)
+                self._insert_rows(conn, "reservations", RESERVATIONS_HEADERS, reservations)
+                self._insert_rows(conn, "absences", ABSENCES_HEADERS, absences)
+                self._insert_rows(conn, "meta", META_HEADERS, meta)
+            except sqlite3.IntegrityError as exc:
+                raise ValueError(f"Import rejected: {exc}") from exc
+
+    def close(self) -> None:
+        return None
+
+    def _select_rows(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        headers: list[str],
+        where: str = "1 = 1",
+        *params: str,
+    ) -> list[dict]:
+        rows = conn.execute(f"SELECT {', '.join(headers)} FROM {table} WHERE {where} ORDER BY rowid", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def _insert_rows(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        headers: list[str],
+        rows: list[dict],
+    ) -> None:
+        placeholders = ", ".join("?" for _ in headers)
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(headers)}) VALUES ({placeholders})",
+            ([row.get(header) for header in headers] for row in rows),
+        )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        pinned = getattr(self._pinned, "conn", None)
+        if pinned is not None:
+            yield pinned
+            return
+        with self._open() as conn:
+            yield conn
+
+    @contextmanager
+    def _open(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=self.busy_timeout_seconds,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._open() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                if conn.total_changes:
+                    self._bump_revision(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _revision(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row["value"]) if row and row["value"] is not None else 0
+
+    def _bump_revision(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('revision', 1) "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def _insert_reservation(
+        self,
+        conn: sqlite3.Connection,
+        user_id: str,
+        desk_id: str,
+        value_date: date,
+        slot: str,
+        now: str,
+    ) -> sqlite3.Row:
+        reservation_id = uuid.uuid4().hex
+        self._check_reservation_conflicts(conn, None, user_id, desk_id, value_date, slot)
+        try:
+            conn.execute(
+                "INSERT INTO reservations "
+                "(reservation_id, user_id, desk_id, date, slot, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (reservation_id, user_id, desk_id, value_date.isoformat(), slot, now, now),
+            )
+        except sqlite3.IntegrityError as exc:
+            raise self._conflict_error(exc) from exc
+        return conn.execute(
+            "SELECT * FROM reservations WHERE reservation_id = ?",
+            (reservation_id,),
+        ).fetchone()
+
+    def _update_reservation(
+        self,
+        conn: sqlite3.Connection,
+        reservation_id: str,
+        user_id: str,
+        desk_id: str,
+        value_date: date,
+        slot: str,
+        now: str,
+        expected_version: int | None = None,
+    ) -> sqlite3.Row | None:
+        if expected_version is not None:
+            current = conn.execute(
+                "SELECT version FROM reservations WHERE reservation_id = ?",
+                (reservation_id,),
+            ).fetchone()
+            if current is not None and current["version"] != expected_version:
+                raise VersionConflictError("Reservation was modified by someone else")
+        self._check_reservation_conflicts(conn, reservation_id, user_id, desk_id, value_date, slot)
+        try:
+            cursor = conn.execute(
+                "UPDATE reservations SET user_id = ?, desk_id = ?, date = ?, slot = ?, updated_at = ?, "
+                "version = version + 1 WHERE reservation_id = ?",
+                (user_id, desk_id, value_date.isoformat(), slot, now, reservation_id),
+            )
+        except sqlite3.IntegrityError as exc:
+            raise self._conflict_error(exc) from exc
+        if cursor.rowcount == 0:
+            return None
+        return conn.execute(
+            "SELECT * FROM reservations WHERE reservation_id = ?",
+            (reservation_id,),
+        ).fetchone()
+
+    def _check_reservation_conflicts(
+        self,
+        conn: sqlite3.Connection,
+        reservation_id: str | None,
+        user_id: str,
+        desk_id: str,
+        value_date: date,
+        slot: str,
+    ) -> None:
+        holders = conn.execute(
+            "SELECT reservation_id, user_id, desk_id FROM reservations "
+            "WHERE date = ? AND slot = ? AND (desk_id = ? OR user_id = ?)",
+            (value_date.isoformat(), slot, desk_id, user_id),
+        ).fetchall()
+        holders = [row for row in holders if row["reservation_id"] != reservation_id]
+        if any(row["desk_id"] == desk_id for row in holders):
+            raise ValueError("Desk already reserved")
+        if holders:
+            raise ValueError("User already has a desk in this slot")
+
+    def _conflict_error(self, exc: sqlite3.IntegrityError) -> ValueError:
+        if "desk_id" in str(exc):
+            return ValueError("Desk already reserved")
+        return ValueError("User already has a desk in this slot")
+
+    def _user_record(self, row: sqlite3.Row) -> UserRecord:
+        return UserRecord(
+            user_id=row["user_id"],
+            name=row["name"],
+            email=row["email"] or None,
+            enabled=normalize_bool(row["enabled"]),
+            is_admin=normalize_bool(row["is_admin"]),
+            created_at=parse_datetime(row["created_at"]),
+        )
+
+    def _desk_record(self, row: sqlite3.Row) -> DeskRecord:
+        return DeskRecord(
+            desk_id=row["desk_id"],
+            label=row["label"],
+            enabled=normalize_bool(row["enabled"]),
+            owner_user_id=row["owner_user_id"] or None,
+        )
+
+    def _reservation_record(self, row: sqlite3.Row) -> ReservationRecord:
+        return ReservationRecord(
+            reservation_id=row["reservation_id"],
+            user_id=row["user_id"],
+            desk_id=row["desk_id"],
+            date=parse_date(row["date"]),
+            slot=row["slot"],
+            created_at=parse_datetime(row["created_at"]),
+            updated_at=parse_datetime(row["updated_at"]),
+            auto=False,
+            version=row["version"] or 1,
+        )
+
+    def _absence_record(self, row: sqlite3.Row) -> AbsenceRecord:
+        return AbsenceRecord(
+            absence_id=row["absence_id"],
+            owner_user_id=row["owner_user_id"],
+            desk_id=row["desk_id"],
+            date=parse_date(row["date"]),
+            slot=row["slot"],
+            created_at=parse_datetime(row["created_at"]),
+        )
@@ -4,6 +4,7 @@ const state = {
   users: [],
   desks: [],
   reservations: [],
+  version: 0,
 };
 
 const el = {
@@ -51,14 +52,25 @@ function message(target, text, ok = false) {
   target.classList.add(ok ? "ok" : "error");
 }
 
+// Last ETag and body per GET path; a 304 reuses the cached body.
+const etagCache = new Map();
+
 async function api(path, options = {}) {
   const headers = options.headers || {};
   headers["Content-Type"] = "application/json";
   if (state.token) {
     headers.Authorization = `Bearer ${state.token}`;
   }
+  const isGet = !options.method || options.method === "GET";
+  const cached = isGet ? etagCache.get(path) : null;
+  if (cached) {
+    headers["If-None-Match"] = cached.etag;
+  }
 
-  const res = await fetch(path, { ...options, headers });
+  const res = await fetch(path, { ...options, headers, cache: isGet ? "no-store" : options.cache });
+  if (res.status === 304 && cached) {
+    return cached.data;
+  }
   let data = null;
   try {
     data = await res.json();
@@ -69,6 +81,10 @@ async function api(path, options = {}) {
     const detail = data && data.detail ? data.detail : `HTTP ${res.status}`;
     throw new Error(detail);
   }
+  const etag = res.headers.get("ETag");
+  if (isGet && etag) {
+    etagCache.set(path, { etag, data });
+  }
   return data;
 }
 
@@ -344,16 +360,12 @@ function renderMyReservations() {
 async function refreshData() {
   const start = todayISO();
   const end = new Date(Date.now() + 6 * 86400000).toISOString().slice(0, 10);
-  const [me, users, desks, reservations] = await Promise.all([
-    api("/api/me"),
-    api("/api/users"),
-    api("/api/desks"),
-    api(`/api/reservations?start_date=${start}&end_date=${end}`),
-  ]);
-  state.me = me;
-  state.users = users;
-  state.desks = desks;
-  state.reservations = reservations;
+  const data = await api(`/api/bootstrap?start_date=${start}&end_date=${end}`);
+  state.me = data.me;
+  state.users = data.users;
+  state.desks = data.desks;
+  state.reservations = data.reservations;
+  state.version = data.version;
 
   renderSession();
   renderDesks();
@@ -363,6 +375,83 @@ async function refreshData() {
   renderAdmin();
 }
 
+// Live updates: the server pushes one event per committed write. Slot events
+// replace the effective reservation at (date, slot, desk); a version gap or a
+// reload event means something changed that deltas cannot express.
+let streamAbort = null;
+
+async function applyEvent(event) {
+  if (event.version !== undefined && event.version < state.version) return;
+  if (event.reload || event.version > state.version + 1) {
+    await refreshData();
+    return;
+  }
+  for (const change of event.slots || []) {
+    state.reservations = state.reservations.filter(
+      (r) => !(r.date === change.date && r.slot === change.slot && r.desk_id === change.desk_id)
+    );
+    if (change.reservation) {
+      state.reservations.push(change.reservation);
+    }
+  }
+  state.version = event.version;
+  renderCalendar();
+  renderDeskMap();
+  renderMyReservations();
+}
+
+function closeStream() {
+  if (streamAbort) {
+    streamAbort.abort();
+    streamAbort = null;
+  }
+}
+
+async function openStream() {
+  closeStream();
+  const controller = new AbortController();
+  streamAbort = controller;
+  try {
+    const res = await fetch("/api/stream", {
+      headers: { Authorization: `Bearer ${state.token}` },
+      signal: controller.signal,
+      cache: "no-store",
+    });
+    if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += value;
+      let boundary = buffer.indexOf("\n\n");
+      while (boundary >= 0) {
+        const data = buffer
+          .slice(0, boundary)
+          .split("\n")
+          .filter((line) => line.startsWith("data: "))
+          .map((line) => line.slice(6))
+          .join("\n");
+        buffer = buffer.slice(boundary + 2);
+        if (data) await applyEvent(JSON.parse(data));
+        boundary = buffer.indexOf("\n\n");
+      }
+    }
+  } catch (_) {
+    if (controller.signal.aborted) return;
+  }
+  if (streamAbort !== controller) return;
+  // Events may have been missed while disconnected; resync before resuming.
+  setTimeout(() => {
+    if (streamAbort !== controller) return;
+    refreshData()
+      .catch(() => {})
+      .finally(() => {
+        if (streamAbort === controller) openStream();
+      });
+  }, 3000);
+}
+
 async function loginFlow() {
   const name = el.nameInput.value.trim();
   if (!name) {
@@ -388,9 +477,11 @@ async function enterApp() {
     await refreshData();
     el.authCard.classList.add("hidden");
     el.appCard.classList.remove("hidden");
+    openStream();
   } catch (err) {
     state.token = "";
     localStorage.removeItem("desk_app_token");
+    etagCache.clear();
     state.me = null;
     el.authCard.classList.remove("hidden");
     el.appCard.classList.add("hidden");
@@ -506,9 +597,11 @@ async function bind() {
     } catch (_) {
       // ignore
     }
+    closeStream();
     state.token = "";
     state.me = null;
     localStorage.removeItem("desk_app_token");
+    etagCache.clear();
     el.authCard.classList.remove("hidden");
     el.appCard.classList.add("hidden");
     renderSession();
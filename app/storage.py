@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import ContextManager, Protocol
+
+from app.config import settings
+from app.models import AbsenceRecord, DeskRecord, ReservationRecord, UserRecord
+from app.store import ReservationOp, Tables
+
+BACKEND_EXCEL = "excel"
+BACKEND_SQLITE = "sqlite"
+
+
+# ``revision`` orders committed writes (clients compare it for gaps); ``tag``
+# names the stored data itself and is the same in every process reading it.
+@dataclass(frozen=True)
+class DataState:
+    revision: int
+    tag: str
+
+
+class Repository(Protocol):
+    def init_storage(self) -> None: ...
+
+    def list_users(self) -> list[UserRecord]: ...
+
+    def get_user_by_name(self, name: str) -> UserRecord | None: ...
+
+    def get_user_by_email(self, email: str) -> UserRecord | None: ...
+
+    def get_user(self, user_id: str) -> UserRecord | None: ...
+
+    def upsert_user(
+        self,
+        name: str,
+        enabled: bool = True,
+        is_admin: bool = False,
+        email: str | None = None,
+    ) -> UserRecord: ...
+
+    def list_desks(self) -> list[DeskRecord]: ...
+
+    def upsert_desk(
+        self,
+        label: str,
+        enabled: bool = True,
+        owner_user_id: str | None = None,
+        desk_id: str | None = None,
+    ) -> DeskRecord: ...
+
+    def get_desk(self, desk_id: str) -> DeskRecord | None: ...
+
+    def list_reservations(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> list[ReservationRecord]: ...
+
+    def get_reservation(self, reservation_id: str) -> ReservationRecord | None: ...
+
+    def create_reservation(self, user_id: str, desk_id: str, value_date: date, slot: str) -> ReservationRecord: ...
+
+    def update_reservation(
+        self,
+        reservation_id: str,
+        user_id: str,
+        desk_id: str,
+        value_date: date,
+        slot: str,
+        expected_version: int | None = None,
+    ) -> ReservationRecord | None: ...
+
+    def delete_reservation(self, reservation_id: str) -> bool: ...
+
+    def apply_reservation_ops(self, ops: list[ReservationOp]) -> list[ReservationRecord | None]: ...
+
+    def list_absences(self) -> list[AbsenceRecord]: ...
+
+    def upsert_absence(
+        self,
+        owner_user_id: str,
+        desk_id: str,
+        value_date: date,
+        slot: str,
+        released: bool,
+    ) -> None: ...
+
+    def list_reservation_history(self, start_date: date, end_date: date) -> list[ReservationRecord]: ...
+
+    def archive_before(self, cutoff: date) -> int: ...
+
+    def stats(self) -> dict[str, int]: ...
+
+    def data_version(self) -> int: ...
+
+    def data_state(self) -> DataState: ...
+
+    def read_snapshot(self) -> ContextManager[None]: ...
+
+    def snapshot_tables(self) -> Tables: ...
+
+    def replace_tables(self, tables: Tables) -> None: ...
+
+    def close(self) -> None: ...
+
+
+def create_repository(backend: str | None = None) -> Repository:
+    name = (backend or settings.backend).strip().lower()
+    if name == BACKEND_EXCEL:
+        from app.repository import ExcelRepository
+
+        return ExcelRepository()
+    if name == BACKEND_SQLITE:
+        from app.sqlite_repository import SqliteRepository
+
+        return SqliteRepository()
+    raise ValueError(f"Unsupported storage backend: {name}")
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Callable
+
+from app.constants import SHEETS
+from app.domain import parse_date
+from app.rows import compact_row
+
+Row = dict[str, Any]
+SlotKey = tuple[date, str, str]
+AbsenceKey = tuple[str, str, date, str]
+OrderKey = tuple[date, str, str, str]
+PRIMARY_KEYS = {
+    "users": "user_id",
+    "desks": "desk_id",
+    "reservations": "reservation_id",
+    "absences": "absence_id",
+    "meta": "key",
+}
+SheetLoader = Callable[[list[str]], dict[str, list[Row]]]
+
+
+@dataclass
+class Tables:
+    users: list[Row]
+    desks: list[Row]
+    reservations: list[Row]
+    absences: list[Row]
+    meta: list[Row]
+
+
+class VersionConflictError(Exception):
+    pass
+
+
+# One step of an atomic reservation batch; ``reservation_id`` is ignored for
+# creates and the placement fields are ignored for cancels.
+@dataclass(frozen=True)
+class ReservationOp:
+    action: str
+    reservation_id: str | None = None
+    user_id: str = ""
+    desk_id: str = ""
+    date: date | None = None
+    slot: str = ""
+    expected_version: int | None = None
+
+
+def row_user_name(row: Row) -> str:
+    name = str(row.get("name") or "").strip()
+    if name:
+        return name
+    email = str(row.get("email") or "").strip()
+    if "@" in email:
+        return email.split("@", 1)[0]
+    return email or "user"
+
+
+# Sheets are parsed on first use through ``loader``; rows must be mutated
+# through the store methods so the indexes stay in sync. Reservations are also
+# kept ordered by (date, slot, desk_id) with dates parsed once, so a date range
+# is two binary searches and a slice.
+class TableStore:
+    def __init__(self, loader: SheetLoader) -> None:
+        self._loader = loader
+        self._rows: dict[str, list[Row]] = {}
+        self.dirty: set[str] = set()
+        self.changes: dict[tuple[str, Any], Row | None] = {}
+        self.mutations = 0
+        self._load_lock = threading.Lock()
+        self._primary: dict[str, dict[Any, Row]] = {name: {} for name in SHEETS}
+        self._users_by_name: dict[str, Row] = {}
+        self._users_by_email: dict[str, Row] = {}
+        self._reservations_by_desk: dict[SlotKey, Row] = {}
+        self._reservations_by_user: dict[SlotKey, Row] = {}
+        self._absences_by_key: dict[AbsenceKey, list[Row]] = {}
+        self._reservation_keys: dict[int, OrderKey] = {}
+        self._reservation_order: list[OrderKey] = []
+        self._reservations_ordered: list[Row] = []
+
+    @classmethod
+    def from_tables(cls, tables: Tables) -> TableStore:
+        store = cls(loader=_no_loader)
+        store._attach({name: [compact_row(name, row) for row in getattr(tables, name)] for name in SHEETS})
+        return store
+
+    @property
+    def tables(self) -> Tables:
+        self.load(*SHEETS)
+        return Tables(**self._rows)
+
+    def reset_loader(self, loader: SheetLoader) -> None:
+        self._loader = loader
+
+    def mark_clean(self) -> None:
+        self.dirty.clear()
+        self.changes.clear()
+
+    def load(self, *names: str) -> None:
+        if all(name in self._rows for name in names):
+            return
+        with self._load_lock:
+            missing = [name for name in names if name not in self._rows]
+            if missing:
+                self._attach(self._loader(missing))
+
+    def rows(self, name: str) -> list[Row]:
+        self.load(name)
+        return self._rows[name]
+
+    def user(self, user_id: str) -> Row | None:
+        self.load("users")
+        return self._primary["users"].get(user_id)
+
+    def user_by_name(self, name: str) -> Row | None:
+        self.load("users")
+        return self._users_by_name.get(name.strip().lower())
+
+    def user_by_email(self, email: str) -> Row | None:
+        self.load("users")
+        return self._users_by_email.get(email.strip().lower())
+
+    def desk(self, desk_id: str) -> Row | None:
+        self.load("desks")
+        return self._primary["desks"].get(desk_id)
+
+    def reservation(self, reservation_id: str) -> Row | None:
+        self.load("reservations")
+        return self._primary["reservations"].get(reservation_id)
+
+    def reservations_between(self, start: date | None = None, end: date | None = None) -> list[Row]:
+        self.load("reservations")
+        order = self._reservation_order
+        low = bisect_left(order, (start,)) if start else 0
+        high = bisect_left(order, (end + timedelta(days=1),)) if end else len(order)
+        return self._reservations_ordered[low:high]
+
+    def reservation_at(self, value_date: date, slot: str, desk_id: str) -> Row | None:
+        self.load("reservations")
+        return self._reservations_by_desk.get((value_date, slot, desk_id))
+
+    def reservation_for_user(self, value_date: date, slot: str, user_id: str) -> Row | None:
+        self.load("reservations")
+        return self._reservations_by_user.get((value_date, slot, user_id))
+
+    def absences_for(self, owner_user_id: str, desk_id: str, value_date: date, slot: str) -> list[Row]:
+        self.load("absences")
+        return list(self._absences_by_key.get((owner_user_id, desk_id, value_date, slot), []))
+
+    def meta_value(self, key: str) -> Any:
+        row = self._by_key("meta", key)
+        return row.get("value") if row else None
+
+    def set_meta(self, key: str, value: Any) -> None:
+        row = self._by_key("meta", key)
+        if row is None:
+            self._add("meta", {"key": key, "value": value})
+        else:
+            self._update("meta", row, {"value": value})
+
+    def add_user(self, row: Row) -> None:
+        self._add("users", row)
+
+    def update_user(self, row: Row, **changes: Any) -> None:
+        self._update("users", row, changes)
+
+    def add_desk(self, row: Row) -> None:
+        self._add("desks", row)
+
+    def update_desk(self, row: Row, **changes: Any) -> None:
+        self._update("desks", row, changes)
+
+    def add_reservation(self, row: Row) -> None:
+        self._add("reservations", row)
+
+    def update_reservation(self, row: Row, **changes: Any) -> None:
+        self._update("reservations", row, changes)
+
+    def remove_reservation(self, reservation_id: str) -> bool:
+        row = self.reservation(reservation_id)
+        if row is None:
+            return False
+        self._remove("reservations", [row])
+        return True
+
+    def remove_reservations(self, rows: list[Row]) -> None:
+        self._remove("reservations", rows)
+
+    def add_absence(self, row: Row) -> None:
+        self._add("absences", row)
+
+    def remove_absences(self, rows: list[Row]) -> None:
+        self._remove("absences", rows)
+
+    def take_changes(self) -> list[list[Any]]:
+        record = [
+            [table, key, dict(row) if row is not None else None]
+            for (table, key), row in self.changes.items()
+        ]
+        self.changes.clear()
+        return record
+
+    def apply_changes(self, record: list[list[Any]]) -> None:
+        for table, key, row in record:
+            existing = self._by_key(table, key)
+            if row is None:
+                if existing is not None:
+                    self._remove(table, [existing])
+            elif existing is not None:
+                self._update(table, existing, row)
+            else:
+                self._add(table, dict(row))
+
+    def _add(self, table: str, row: Row) -> None:
+        # Stored as a compact row; the caller's dict is only a template.
+        row = compact_row(table, row)
+        self.rows(table).append(row)
+        self._index(table, row)
+        self._record(table, row)
+
+    def _update(self, table: str, row: Row, changes: dict[str, Any]) -> None:
+        self._unindex(table, row)
+        row.update(changes)
+        self._index(table, row)
+        self._record(table, row)
+
+    def _remove(self, table: str, rows: list[Row]) -> None:
+        doomed = {id(row) for row in rows}
+        for row in rows:
+            self._unindex(table, row)
+            self._record(table, row, deleted=True)
+        self._rows[table] = [item for item in self.rows(table) if id(item) not in doomed]
+
+    def _record(self, table: str, row: Row, deleted: bool = False) -> None:
+        self.mutations += 1
+        self.dirty.add(table)
+        key = (table, row.get(PRIMARY_KEYS[table]))
+        # Re-insert so the change order reflects the latest touch of each row.
+        self.changes.pop(key, None)
+        self.changes[key] = None if deleted else row
+
+    def _by_key(self, table: str, key: Any) -> Row | None:
+        self.load(table)
+        return self._primary[table].get(key)
+
+    def _attach(self, loaded: dict[str, list[Row]]) -> None:
+        for name, rows in loaded.items():
+            for row in rows:
+                self._index(name, row)
+            self._rows[name] = rows
+        if "reservations" in loaded and self._reservation_order:
+            pairs = sorted(zip(self._reservation_order, self._reservations_ordered), key=lambda pair: pair[0])
+            self._reservation_order = [key for key, _ in pairs]
+            self._reservations_ordered = [row for _, row in pairs]
+
+    def _index(self, table: str, row: Row) -> None:
+        key = row.get(PRIMARY_KEYS[table])
+        if not key:
+            return
+        self._primary[table].setdefault(key, row)
+        if table == "users":
+            self._index_user(row)
+        elif table == "reservations":
+            self._index_reservation(row)
+        elif table == "absences":
+            self._index_absence(row)
+
+    def _unindex(self, table: str, row: Row) -> None:
+        key = row.get(PRIMARY_KEYS[table])
+        if not key:
+            return
+        _discard(self._primary[table], key, row)
+        if table == "users":
+            self._unindex_user(row)
+        elif table == "reservations":
+            self._unindex_reservation(row)
+        elif table == "absences":
+            self._unindex_absence(row)
+
+    def _index_user(self, row: Row) -> None:
+        self._users_by_name.setdefault(row_user_name(row).lower(), row)
+        email = str(row.get("email") or "").strip().lower()
+        if email:
+            self._users_by_email.setdefault(email, row)
+
+    def _unindex_user(self, row: Row) -> None:
+        _discard(self._users_by_name, row_user_name(row).lower(), row)
+        _discard(self._users_by_email, str(row.get("email") or "").strip().lower(), row)
+
+    def _index_reservation(self, row: Row) -> None:
+        value_date = parse_date(row["date"])
+        key = (value_date, str(row["slot"]), str(row["desk_id"]), str(row["reservation_id"]))
+        self._reservation_keys[id(row)] = key
+        self._reservations_by_desk.setdefault((value_date, row["slot"], row["desk_id"]), row)
+        self._reservations_by_user.setdefault((value_date, row["slot"], row["user_id"]), row)
+        if "reservations" in self._rows:
+            position = bisect_left(self._reservation_order, key)
+            self._reservation_order.insert(position, key)
+            self._reservations_ordered.insert(position, row)
+        else:
+            # Initial load: _attach sorts once at the end.
+            self._reservation_order.append(key)
+            self._reservations_ordered.append(row)
+
+    def _unindex_reservation(self, row: Row) -> None:
+        key = self._reservation_keys.pop(id(row), None)
+        if key is None:
+            return
+        value_date = key[0]
+        _discard(self._reservations_by_desk, (value_date, row["slot"], row["desk_id"]), row)
+        _discard(self._reservations_by_user, (value_date, row["slot"], row["user_id"]), row)
+        position = bisect_left(self._reservation_order, key)
+        while position < len(self._reservation_order) and self._reservation_order[position] == key:
+            if self._reservations_ordered[position] is row:
+                del self._reservation_order[position]
+                del self._reservations_ordered[position]
+                break
+            position += 1
+
+    def _index_absence(self, row: Row) -> None:
+        self._absences_by_key.setdefault(self._absence_key(row), []).append(row)
+
+    def _unindex_absence(self, row: Row) -> None:
+        key = self._absence_key(row)
+        bucket = [item for item in self._absences_by_key.get(key, []) if item is not row]
+        if bucket:
+            self._absences_by_key[key] = bucket
+        else:
+            self._absences_by_key.pop(key, None)
+
+    def _absence_key(self, row: Row) -> AbsenceKey:
+        return (row.get("owner_user_id"), row.get("desk_id"), parse_date(row["date"]), row.get("slot"))
+
+
+def _no_loader(names: list[str]) -> dict[str, list[Row]]:
+    raise KeyError(f"Tables not loaded: {', '.join(names)}")
+
+
+def _discard(index: dict[Any, Row], key: Any, row: Row) -> None:
+    if index.get(key) is row:
+        del index[key]
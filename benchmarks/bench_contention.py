@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from filelock import FileLock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.repository import ExcelRepository  # noqa: E402
+
+
+def run(tmp: Path, writers: int, bookings: int, window_ms: float, max_batch: int) -> float:
+    repo = ExcelRepository()
+    repo.data_file = tmp / f"bench-{window_ms}-{max_batch}.xlsx"
+    repo.backup_dir = tmp / "backups"
+    repo.lock = FileLock(str(tmp / "bench.lock"))
+    repo.writer.window_seconds = window_ms / 1000
+    repo.writer.max_batch = max_batch
+    repo.init_storage()
+    users = [repo.upsert_user(f"user{index}").user_id for index in range(writers)]
+    for index in range(bookings):
+        repo.upsert_desk(label=f"Desk {index}", desk_id=f"d{index}")
+
+    def worker(offset: int) -> None:
+        for index in range(offset, bookings, writers):
+            day = date(2030, 1, 1 + index // writers)
+            repo.create_reservation(users[offset], f"d{index}", day, "AM" if index % 2 == 0 else "PM")
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    repo.backups.flush()
+    return bookings / elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Booking throughput with concurrent writers")
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--bookings", type=int, default=320)
+    args = parser.parse_args()
+
+    print(f"{'window ms':>9} {'max batch':>9} {'bookings/s':>11}")
+    with TemporaryDirectory() as tmp:
+        for window_ms, max_batch in ((0, 1), (0, 64), (5, 64)):
+            rate = run(Path(tmp), args.writers, args.bookings, window_ms, max_batch)
+            print(f"{window_ms:>9} {max_batch:>9} {rate:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from openpyxl import Workbook, load_workbook
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.constants import SHEETS  # noqa: E402
+from app.excel_bridge import SHEET_HEADERS  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def build_fixture(path: Path, reservations: int) -> None:
+    wb = Workbook(write_only=True)
+    now = datetime(2030, 1, 1).isoformat()
+    users = [uuid.uuid4().hex for _ in range(200)]
+    desks = [f"d{index}" for index in range(50)]
+    sheets = {}
+    for name in SHEETS:
+        sheets[name] = wb.create_sheet(name)
+        sheets[name].append(SHEET_HEADERS[name])
+    for index, user_id in enumerate(users):
+        sheets["users"].append([user_id, f"user{index}", f"user{index}@ide-tech.com", True, False, now])
+    for desk_id in desks:
+        sheets["desks"].append([desk_id, desk_id.upper(), True, None])
+    start = date(2020, 1, 1)
+    for index in range(reservations):
+        day = start + timedelta(days=index // (len(desks) * 2))
+        sheets["reservations"].append(
+            [
+                uuid.uuid4().hex,
+                users[index % len(users)],
+                desks[(index // 2) % len(desks)],
+                day.isoformat(),
+                "AM" if index % 2 == 0 else "PM",
+                now,
+                now,
+            ]
+        )
+    wb.save(path)
+
+
+def measure(path: Path, mode: str) -> dict[str, float]:
+    from app.repository import ExcelRepository
+
+    started = time.perf_counter()
+    if mode == "full":
+        wb = load_workbook(path)
+        rows = sum(1 for _ in wb["reservations"].iter_rows(min_row=2, values_only=True))
+        wb.close()
+    else:
+        repo = ExcelRepository()
+        repo.data_file = path
+        repo.backup_dir = path.parent / "backups"
+        sheet = "desks" if mode == "desks-only" else "reservations"
+        rows = len(repo._read_store(sheet).rows(sheet))
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"rows": rows, "seconds": elapsed, "peak_rss_mb": peak_kb / 1024}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare full vs read-only workbook parsing")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES)
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(Path(args.child[0]), args.child[1])))
+        return 0
+
+    print(f"{'rows':>8} {'mode':>14} {'seconds':>9} {'peak RSS MB':>12}")
+    with TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = Path(tmp) / f"bench-{size}.xlsx"
+            build_fixture(path, size)
+            for mode in ("full", "read-only", "desks-only"):
+                # Each measurement runs in a fresh interpreter so peak RSS is per-mode.
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", str(path), mode],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                result = json.loads(output)
+                print(f"{size:>8} {mode:>14} {result['seconds']:>9.3f} {result['peak_rss_mb']:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.main import RESERVATIONS_JSON, JSON_BODIES, _json_response  # noqa: E402
+from app.models import ReservationRecord  # noqa: E402
+
+
+def week_of_records(desks: int) -> list[ReservationRecord]:
+    start = date(2030, 1, 6)
+    stamp = datetime(2029, 12, 1, 9, 30)
+    return [
+        ReservationRecord(
+            reservation_id=f"{day:02d}{slot}{desk:028x}",
+            user_id=f"user-{desk:028d}",
+            desk_id=f"desk-{desk:04d}",
+            date=start + timedelta(days=day),
+            slot=slot,
+            created_at=stamp,
+            updated_at=stamp,
+        )
+        for day in range(7)
+        for slot in ("AM", "PM")
+        for desk in range(desks)
+    ]
+
+
+def build_app(records: list[ReservationRecord]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/model", response_model=list[ReservationRecord])
+    async def through_response_model():
+        return records
+
+    @app.get("/fast", response_model=list[ReservationRecord])
+    async def through_fast_path(request: Request):
+        return await _json_response(request, '"bench"', RESERVATIONS_JSON, lambda: records)
+
+    return app
+
+
+async def call(app: FastAPI, path: str, accept_encoding: str | None) -> int:
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("bench", 1),
+        "server": ("bench", 80),
+    }
+    size = 0
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return size
+
+
+async def measure(app: FastAPI, path: str, accept_encoding: str | None, rounds: int, cached: bool) -> tuple[float, int]:
+    size = await call(app, path, accept_encoding)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        if not cached:
+            JSON_BODIES.clear()
+        await call(app, path, accept_encoding)
+    return rounds / (time.perf_counter() - started), size
+
+
+async def run(desks: int, rounds: int) -> None:
+    records = week_of_records(desks)
+    app = build_app(records)
+    cases = [
+        ("response_model", "/model", None, False),
+        ("fast, uncached", "/fast", None, False),
+        ("fast, uncached, gzip", "/fast", "gzip", False),
+        ("fast, cached", "/fast", None, True),
+        ("fast, cached, gzip", "/fast", "gzip", True),
+    ]
+    print(f"{len(records)} reservations per response")
+    print(f"{'path':<22} {'req/s':>8} {'bytes':>9}")
+    for label, path, accept_encoding, cached in cases:
+        rate, size = await measure(app, path, accept_encoding, rounds, cached)
+        print(f"{label:<22} {rate:>8.1f} {size:>9}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Throughput of the list endpoint response paths")
+    parser.add_argument("--desks", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.desks, args.rounds))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
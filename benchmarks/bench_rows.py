@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from functools import partial
+from itertools import zip_longest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable
+
+from filelock import FileLock
+from openpyxl import load_workbook
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.repository import ExcelRepository  # noqa: E402
+from app.store import TableStore, Tables  # noqa: E402
+
+
+def build(tmp: Path, reservations: int, desks: int) -> ExcelRepository:
+    repo = ExcelRepository()
+    repo.data_file = tmp / "bench.xlsx"
+    repo.backup_dir = tmp / "backups"
+    repo.lock = FileLock(str(tmp / "bench.lock"))
+    repo.init_storage()
+    start = date(2030, 1, 1)
+    stamp = datetime(2029, 12, 1).isoformat()
+    rows = [
+        {
+            "reservation_id": f"{index:032x}",
+            "user_id": f"user-{index % desks:028d}",
+            "desk_id": f"desk-{index % desks:04d}",
+            "date": (start + timedelta(days=index // (2 * desks))).isoformat(),
+            "slot": "AM" if index % 2 == 0 else "PM",
+            "created_at": stamp,
+            "updated_at": stamp,
+            "version": 1,
+        }
+        for index in range(reservations)
+    ]
+    repo.replace_tables(Tables(users=[], desks=[], reservations=rows, absences=[], meta=[]))
+    repo.backups.flush()
+    return repo
+
+
+Loader = Callable[[list[str]], dict[str, list[Any]]]
+
+
+def load_dict_rows(repo: ExcelRepository, names: list[str]) -> dict[str, list[dict[str, Any]]]:
+    # The layout before compact rows: one plain dict per sheet row.
+    headers = repo._sheet_headers()
+    wb = load_workbook(repo.data_file, read_only=True)
+    try:
+        loaded = {}
+        for name in names:
+            width = len(headers[name])
+            loaded[name] = [
+                dict(zip_longest(headers[name], row[:width]))
+                for row in wb[name].iter_rows(min_row=2, max_col=width, values_only=True)
+                if any(item is not None for item in row)
+            ]
+        return loaded
+    finally:
+        wb.close()
+
+
+def load_store(loader: Loader) -> TableStore:
+    store = TableStore(loader=loader)
+    store.load("reservations")
+    return store
+
+
+def measure_load(loader: Loader) -> tuple[float, float]:
+    started = time.perf_counter()
+    load_store(loader)
+    elapsed = time.perf_counter() - started
+    # Traced separately: tracemalloc slows allocation-heavy code severalfold.
+    gc.collect()
+    tracemalloc.start()
+    store = load_store(loader)
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held / len(store.rows("reservations")), elapsed
+
+
+def measure_list(repo: ExcelRepository, rounds: int) -> float:
+    repo.list_reservations()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        repo.list_reservations()
+    return (time.perf_counter() - started) / rounds
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-row memory and load time of the Excel row layer")
+    parser.add_argument("--reservations", type=int, default=20000)
+    parser.add_argument("--desks", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp:
+        repo = build(Path(tmp), args.reservations, args.desks)
+        dict_bytes, dict_seconds = measure_load(partial(load_dict_rows, repo))
+        bytes_per_row, load_seconds = measure_load(partial(repo._load_sheets_read_only, None))
+        list_seconds = measure_list(repo, args.rounds)
+    print(f"rows                        {args.reservations}")
+    print(f"dict rows, bytes per row    {dict_bytes:.0f}")
+    print(f"dict rows, store load       {dict_seconds * 1000:.0f} ms")
+    print(f"compact rows, bytes per row {bytes_per_row:.0f}")
+    print(f"compact rows, store load    {load_seconds * 1000:.0f} ms")
+    print(f"list_reservations           {list_seconds * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
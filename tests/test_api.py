@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from filelock import FileLock
+
+import app.deps
+import app.main
+from app.repository import ExcelRepository
+from app.security import AuthStore
+from app.services import ReservationService
+from app.sessions import MemorySessionStore
+
+
+def _next_workday():
+    today = datetime.utcnow().date()
+    for offset in range(0, 7):
+        d = today + timedelta(days=offset)
+        if d.weekday() in {6, 0, 1, 2, 3}:
+            return d
+    raise AssertionError("No workday found")
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    # Point the app's module-level repository, service and sessions at a
+    # throwaway workbook; the client is not entered, so startup tasks stay off.
+    repo = ExcelRepository()
+    repo.data_file = tmp_path / "reservations.xlsx"
+    repo.backup_dir = tmp_path / "backups"
+    repo.lock = FileLock(str(tmp_path / "reservations.lock"))
+    repo.init_storage()
+    repo.upsert_desk(label="Desk 1", enabled=True, owner_user_id=None, desk_id="d1")
+    service = ReservationService(repo=repo)
+    auth_store = AuthStore(MemorySessionStore(max_size=100))
+    for module in (app.main, app.deps):
+        monkeypatch.setattr(module, "repo", repo)
+        monkeypatch.setattr(module, "service", service)
+        monkeypatch.setattr(module, "auth_store", auth_store)
+
+    test_client = TestClient(app.main.app)
+    token = test_client.post("/api/auth/login", json={"name": "alice"}).json()["token"]
+    test_client.headers["Authorization"] = f"Bearer {token}"
+    return test_client
+
+
+def _book(client, slot="AM"):
+    payload = {"desk_id": "d1", "date": _next_workday().isoformat(), "slot": slot}
+    response = client.post("/api/reservations", json=payload)
+    assert response.status_code == 200
+    return response.json()[0]
+
+
+@pytest.mark.parametrize("path", ["/api/me", "/api/users", "/api/desks", "/api/reservations", "/api/bootstrap"])
+def test_conditional_get_revalidates_after_write(client, path):
+    first = client.get(path)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('"')
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.headers["ETag"] == etag and cached.content == b""
+    assert client.get(path, headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get(path, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    _book(client)
+
+    fresh = client.get(path, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["ETag"] != etag
+
+
+def test_patch_checks_if_match_against_reservation_version(client):
+    reservation = _book(client)
+    url = f"/api/reservations/{reservation['reservation_id']}"
+    assert reservation["version"] == 1
+
+    updated = client.patch(url, json={"slot": "PM"}, headers={"If-Match": '"1"'})
+    assert updated.status_code == 200
+    assert updated.json()["version"] == 2 and updated.headers["ETag"] == '"2"'
+
+    stale = client.patch(url, json={"slot": "AM"}, headers={"If-Match": '"1"'})
+    assert stale.status_code == 412
+
+    for malformed in ('"abc"', '"1-2"', "W/"):
+        assert client.patch(url, json={"slot": "AM"}, headers={"If-Match": malformed}).status_code == 400
+
+    weak = client.patch(url, json={"slot": "AM"}, headers={"If-Match": 'W/"2"'})
+    assert weak.status_code == 200 and weak.headers["ETag"] == '"3"'
+
+    wildcard = client.patch(url, json={"slot": "PM"}, headers={"If-Match": "*"})
+    assert wildcard.status_code == 200 and wildcard.headers["ETag"] == '"4"'
+    unconditional = client.patch(url, json={"slot": "AM"})
+    assert unconditional.status_code == 200 and unconditional.headers["ETag"] == '"5"'
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app.backups import BackupEntry, BackupStore, RetentionPolicy
+
+
+def _policy() -> RetentionPolicy:
+    return RetentionPolicy(keep_all=timedelta(hours=1), hourly=timedelta(days=1), daily=timedelta(days=30))
+
+
+def test_retention_keeps_recent_then_hourly_then_daily():
+    now = datetime(2030, 1, 31, 12, 0)
+    stamps = [
+        now - timedelta(minutes=5),
+        now - timedelta(minutes=50),
+        now - timedelta(hours=3, minutes=10),
+        now - timedelta(hours=3, minutes=40),
+        now - timedelta(days=3, hours=1),
+        now - timedelta(days=3, hours=5),
+        now - timedelta(days=45),
+    ]
+    entries = [
+        BackupEntry(backup_id=str(i), created_at=stamp.isoformat(), sha256="x", size=1)
+        for i, stamp in enumerate(stamps)
+    ]
+
+    kept = {entry.backup_id for entry in _policy().select(entries, now)}
+
+    assert kept == {"0", "1", "2", "4"}
+
+
+def test_identical_content_is_stored_once_and_restorable(tmp_path):
+    store = BackupStore(tmp_path / "backups", policy=_policy())
+    source = tmp_path / "reservations.xlsx"
+    source.write_bytes(b"same workbook bytes")
+
+    store.stage(source)
+    store.stage(source)
+    store.flush()
+
+    backups = store.list_backups()
+    assert len(backups) == 2
+    assert len(list(store.objects_dir.glob("*.xlsx.gz"))) == 1
+    restored = store.materialize(backups[0].backup_id, tmp_path / "restored.xlsx")
+    assert restored.read_bytes() == b"same workbook bytes"
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from filelock import FileLock
+from openpyxl import Workbook
+
+from app.constants import RESERVATIONS_HEADERS
+from app.excel_bridge import export_workbook, import_workbook
+from app.repository import ExcelRepository
+from app.sqlite_repository import SqliteRepository
+
+
+def test_export_then_import_round_trips_between_backends(tmp_path):
+    excel = ExcelRepository()
+    excel.data_file = tmp_path / "reservations.xlsx"
+    excel.backup_dir = tmp_path / "backups"
+    excel.lock = FileLock(str(tmp_path / "reservations.lock"))
+    excel.init_storage()
+    alice = excel.upsert_user("Alice", enabled=True, is_admin=True)
+    excel.upsert_desk(label="Desk 1", desk_id="d1", owner_user_id=alice.user_id)
+    excel.create_reservation(alice.user_id, "d1", date(2030, 1, 6), "AM")
+    excel.upsert_absence(alice.user_id, "d1", date(2030, 1, 7), "PM", released=True)
+
+    exported = export_workbook(excel, tmp_path / "exports" / "out.xlsx")
+
+    sqlite = SqliteRepository()
+    sqlite.db_file = tmp_path / "reservations.db"
+    sqlite.init_storage()
+    counts = import_workbook(sqlite, exported)
+
+    assert counts["users"] == 1 and counts["reservations"] == 1
+    assert sqlite.get_user_by_name("alice").is_admin
+    assert sqlite.get_desk("d1").owner_user_id == alice.user_id
+    assert [r.date for r in sqlite.list_reservations()] == [date(2030, 1, 6)]
+    assert [(a.date, a.slot) for a in sqlite.list_absences()] == [(date(2030, 1, 7), "PM")]
+
+
+def _excel_repo(tmp_path):
+    repo = ExcelRepository()
+    repo.data_file = tmp_path / "reservations.xlsx"
+    repo.backup_dir = tmp_path / "backups"
+    repo.lock = FileLock(str(tmp_path / "reservations.lock"))
+    repo.init_storage()
+    return repo
+
+
+def test_rejected_import_leaves_storage_untouched(tmp_path):
+    repo = _excel_repo(tmp_path)
+    alice = repo.upsert_user("Alice", enabled=True, is_admin=True)
+    repo.upsert_desk(label="Desk 1", desk_id="d1")
+    repo.create_reservation(alice.user_id, "d1", date(2030, 1, 6), "AM")
+    before = repo._file_signature()
+
+    source = tmp_path / "bad.xlsx"
+    wb = Workbook()
+    wb.active.title = "reservations"
+    wb["reservations"].append(RESERVATIONS_HEADERS)
+    wb["reservations"].append(["r-bad", alice.user_id, "d1", "not-a-date", "AM"])
+    wb.save(source)
+
+    with pytest.raises(ValueError):
+        import_workbook(repo, source)
+
+    assert repo._file_signature() == before
+    assert [u.user_id for u in repo.list_users()] == [alice.user_id]
+    assert [r.date for r in repo.list_reservations()] == [date(2030, 1, 6)]
+
+
+def test_import_maps_missing_column_to_none(tmp_path):
+    repo = _excel_repo(tmp_path)
+    source = tmp_path / "users.xlsx"
+    wb = Workbook()
+    wb.active.title = "users"
+    wb["users"].append(["user_id", "name", "enabled", "is_admin", "created_at"])
+    wb["users"].append(["u1", "Alice", True, False, "2030-01-01T08:00:00"])
+    wb.save(source)
+
+    import_workbook(repo, source)
+
+    user = repo.get_user_by_name("alice")
+    assert user.user_id == "u1" and user.email is None and user.enabled
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.executor import StorageExecutor
+
+
+def test_reads_bypass_a_saturated_write_lane():
+    io = StorageExecutor(read_workers=2, write_workers=1, queue_limit=2)
+    release = threading.Event()
+
+    async def scenario():
+        slow_writes = [asyncio.ensure_future(io.write(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as exc:
+            await io.write(lambda: None)
+        assert exc.value.status_code == 503
+        assert await io.read(lambda: "fresh") == "fresh"
+        metrics = io.metrics()
+        assert metrics["write"]["running"] == 1 and metrics["write"]["queued"] == 1
+        release.set()
+        await asyncio.gather(*slow_writes)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        io.shutdown()
+    metrics = io.metrics()
+    assert metrics["write"]["completed"] == 2 and metrics["write"]["rejected"] == 1
+    assert metrics["write"]["wait_ms_max"] > 0
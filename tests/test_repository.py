@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import pytest
+from filelock import FileLock
+
+import app.repository as repository_module
+from app.repository import ExcelRepository
+
+
+@pytest.fixture()
+def repo(tmp_path):
+    repo = ExcelRepository()
+    repo.data_file = tmp_path / "reservations.xlsx"
+    repo.backup_dir = tmp_path / "backups"
+    repo.lock = FileLock(str(tmp_path / "reservations.lock"))
+    repo.init_storage()
+    return repo
+
+
+def _count_loads(monkeypatch) -> list[int]:
+    calls = [0]
+    original = repository_module.load_workbook
+
+    def counting(*args, **kwargs):
+        calls[0] += 1
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(repository_module, "load_workbook", counting)
+    return calls
+
+
+def test_reads_served_from_snapshot_until_file_changes(repo, monkeypatch):
+    repo.upsert_user("alice", enabled=True, is_admin=False)
+    repo.list_desks()
+    repo.list_reservations()
+    calls = _count_loads(monkeypatch)
+
+    assert [u.name for u in repo.list_users()] == ["alice"]
+    repo.list_desks()
+    repo.list_reservations()
+    assert calls[0] == 0
+
+    other = ExcelRepository()
+    other.data_file = repo.data_file
+    other.backup_dir = repo.backup_dir
+    other.lock = repo.lock
+    other.upsert_user("bob", enabled=True, is_admin=False)
+
+    assert sorted(u.name for u in repo.list_users()) == ["alice", "bob"]
+    assert calls[0] == 2
+
+
+def test_store_indexes_follow_mutations(repo):
+    from datetime import date
+
+    alice = repo.upsert_user("Alice", enabled=True, is_admin=False, email="Alice@ide-tech.com")
+    desk = repo.upsert_desk(label="Desk 1", desk_id="d1")
+    day = date(2030, 1, 6)
+    reservation = repo.create_reservation(alice.user_id, desk.desk_id, day, "AM")
+
+    assert repo.get_user_by_name(" alice ").user_id == alice.user_id
+    assert repo.get_user_by_email("alice@IDE-TECH.com").user_id == alice.user_id
+    assert repo.get_reservation(reservation.reservation_id).desk_id == "d1"
+
+    repo.update_reservation(reservation.reservation_id, alice.user_id, "d1", day, "PM")
+    repo.create_reservation(alice.user_id, "d1", day, "AM")
+    with pytest.raises(ValueError):
+        repo.create_reservation(alice.user_id, "d1", day, "PM")
+
+    assert repo.delete_reservation(reservation.reservation_id)
+    assert repo.get_reservation(reservation.reservation_id) is None
+    repo.create_reservation(alice.user_id, "d1", day, "PM")
+
+
+def test_reservation_ranges_are_sorted_slices(repo):
+    from datetime import date
+
+    users = [repo.upsert_user(f"user{index}").user_id for index in range(3)]
+    first = repo.create_reservation(users[0], "d2", date(2030, 1, 8), "PM")
+    repo.create_reservation(users[1], "d1", date(2030, 1, 7), "AM")
+    repo.create_reservation(users[2], "d3", date(2030, 1, 8), "AM")
+    repo.create_reservation(users[0], "d1", date(2030, 1, 9), "AM")
+
+    def placements(start=None, end=None):
+        return [(r.date.day, r.slot, r.desk_id) for r in repo.list_reservations(start, end)]
+
+    assert placements() == [(7, "AM", "d1"), (8, "AM", "d3"), (8, "PM", "d2"), (9, "AM", "d1")]
+    assert placements(date(2030, 1, 8), date(2030, 1, 8)) == [(8, "AM", "d3"), (8, "PM", "d2")]
+    assert placements(date(2030, 1, 10)) == []
+
+    repo.update_reservation(first.reservation_id, users[0], "d0", date(2030, 1, 7), "PM")
+    assert placements(end=date(2030, 1, 7)) == [(7, "AM", "d1"), (7, "PM", "d0")]
+    repo.delete_reservation(first.reservation_id)
+    assert placements(date(2030, 1, 7), date(2030, 1, 8)) == [(7, "AM", "d1"), (8, "AM", "d3")]
+
+
+def test_loaded_rows_are_compact_and_share_repeated_values(repo):
+    from datetime import date
+
+    from app.rows import SheetRow
+
+    alice = repo.upsert_user("alice", enabled=True, is_admin=False)
+    repo.upsert_user("bob", enabled=True, is_admin=False)
+    first = repo.create_reservation(alice.user_id, "d1", date(2030, 1, 6), "AM")
+    repo.create_reservation(alice.user_id, "d1", date(2030, 1, 6), "PM")
+
+    other = ExcelRepository()
+    other.data_file = repo.data_file
+    other.backup_dir = repo.backup_dir
+    other.lock = repo.lock
+    rows = other._read_store("reservations").rows("reservations")
+    assert all(isinstance(row, SheetRow) for row in rows)
+    assert rows[0]["user_id"] is rows[1]["user_id"]
+    assert rows[0]["date"] is rows[1]["date"]
+    assert dict(rows[0])["reservation_id"] == first.reservation_id
+    with pytest.raises(KeyError):
+        rows[0]["label"] = "x"
+
+    other.update_reservation(first.reservation_id, alice.user_id, "d2", date(2030, 1, 6), "AM")
+    assert other.get_reservation(first.reservation_id).desk_id == "d2"
+
+
+def test_reads_parse_only_the_sheets_they_need(repo, monkeypatch):
+    repo.upsert_desk(label="Desk 1", desk_id="d1")
+    repo._snapshot = None
+    parsed: list[str] = []
+    original = ExcelRepository._read_sheet
+
+    def recording(self, workbook, name, headers):
+        parsed.append(name)
+        return original(self, workbook, name, headers)
+
+    monkeypatch.setattr(ExcelRepository, "_read_sheet", recording)
+
+    assert [d.desk_id for d in repo.list_desks()] == ["d1"]
+    assert parsed == ["desks"]
+    repo.list_reservations()
+    repo.list_desks()
+    assert parsed == ["desks", "reservations"]
+
+
+def test_writes_only_serialize_dirty_sheets(repo, monkeypatch):
+    from datetime import date
+
+    owner = repo.upsert_user("owner", enabled=True, is_admin=False)
+    repo.upsert_desk(label="Desk 1", desk_id="d1", owner_user_id=owner.user_id)
+    written: list[str] = []
+    original = ExcelRepository._write_sheet
+
+    def recording(self, workbook, name, headers, rows):
+        written.append(name)
+        return original(self, workbook, name, headers, rows)
+
+    monkeypatch.setattr(ExcelRepository, "_write_sheet", recording)
+    repo.backups.flush()
+    backups_before = len(repo.backups.list_backups())
+
+    repo.upsert_absence(owner.user_id, "d1", date(2030, 1, 6), "AM", released=True)
+    assert written == ["absences", "meta"]
+
+    assert not repo.delete_reservation("missing")
+    assert written == ["absences", "meta"]
+    repo.backups.flush()
+    assert len(repo.backups.list_backups()) == backups_before + 1
+    assert repo.get_user(owner.user_id).name == "owner"
+    assert len(repo.list_absences()) == 1
+
+
+def test_journal_mode_replays_and_compacts(repo, tmp_path):
+    from datetime import date
+
+    from app.journal import Journal
+
+    repo.journal = Journal(tmp_path / "reservations.journal")
+    signature = repo._file_signature()
+
+    alice = repo.upsert_user("alice", enabled=True, is_admin=False)
+    repo.upsert_desk(label="Desk 1", desk_id="d1")
+    reservation = repo.create_reservation(alice.user_id, "d1", date(2030, 1, 6), "AM")
+    repo.delete_reservation(reservation.reservation_id)
+    repo.create_reservation(alice.user_id, "d1", date(2030, 1, 6), "PM")
+    assert repo._file_signature() == signature
+
+    restarted = ExcelRepository()
+    restarted.data_file = repo.data_file
+    restarted.backup_dir = repo.backup_dir
+    restarted.lock = repo.lock
+    restarted.journal = Journal(tmp_path / "reservations.journal")
+    assert [(r.desk_id, r.slot) for r in restarted.list_reservations()] == [("d1", "PM")]
+
+    assert restarted.compact_journal()
+    assert restarted.journal.size() == 0
+    plain = ExcelRepository()
+    plain.data_file = repo.data_file
+    plain.backup_dir = repo.backup_dir
+    plain.lock = repo.lock
+    assert plain.get_user(alice.user_id).name == "alice"
+    assert [(r.desk_id, r.slot) for r in plain.list_reservations()] == [("d1", "PM")]
+
+
+def test_failed_journal_append_is_not_visible(repo, tmp_path, monkeypatch):
+    from datetime import date
+
+    from app.journal import Journal
+
+    repo.journal = Journal(tmp_path / "reservations.journal")
+    alice = repo.upsert_user("alice", enabled=True, is_admin=False)
+    revision = repo.data_version()
+
+    def full_disk(record):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(repo.journal, "append", full_disk)
+    with pytest.raises(OSError):
+        repo.create_reservation(alice.user_id, "d1", date(2030, 1, 6), "AM")
+    assert repo.list_reservations() == []
+    assert repo.data_version() == revision
+
+    monkeypatch.undo()
+    repo.create_reservation(alice.user_id, "d1", date(2030, 1, 6), "PM")
+    assert repo.compact_journal()
+    assert [r.slot for r in repo.list_reservations()] == ["PM"]
+
+
+def test_concurrent_writes_share_one_persist(repo, monkeypatch):
+    import threading
+    from datetime import date
+
+    users = [repo.upsert_user(f"user{index}", enabled=True, is_admin=False) for index in range(8)]
+    repo.upsert_desk(label="Desk 1", desk_id="d1")
+    day = date(2030, 1, 6)
+    persists = [0]
+    original = repo._persist_workbook
+
+    def counting(workbook):
+        persists[0] += 1
+        return original(workbook)
+
+    monkeypatch.setattr(repo, "_persist_workbook", counting)
+    repo.writer.window_seconds = 0.2
+    repo.writer.max_batch = len(users)
+    results: dict[int, object] = {}
+
+    def book(index: int) -> None:
+        desk_id = "d1" if index < 2 else f"d{index}"
+        try:
+            results[index] = repo.create_reservation(users[index].user_id, desk_id, day, "AM")
+        except ValueError as exc:
+            results[index] = exc
+
+    threads = [threading.Thread(target=book, args=(index,)) for index in range(len(users))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    errors = [item for item in results.values() if isinstance(item, ValueError)]
+    assert len(errors) == 1 and str(errors[0]) == "Desk already reserved"
+    assert len(repo.list_reservations()) == len(users) - 1
+    assert persists[0] < len(users) - 1
+
+
+def test_share_replica_queues_writes_while_share_is_offline(tmp_path):
+    from app.replica import ShareReplica
+
+    share_dir = tmp_path / "share"
+    share_dir.mkdir()
+    repo = ExcelRepository()
+    repo.replica = ShareReplica(
+        share=share_dir / "reservations.xlsx",
+        local=tmp_path / "local" / "reservations.xlsx",
+        poll_seconds=3600,
+        guard=repo._exclusive,
+    )
+    repo.data_file = repo.replica.local
+    repo.backup_dir = tmp_path / "backups"
+    repo.lock = FileLock(str(tmp_path / "reservations.lock"))
+    repo.init_storage()
+    repo.upsert_user("alice", enabled=True, is_admin=False)
+    repo.replica.poll()
+
+    on_share = ExcelRepository()
+    on_share.data_file = share_dir / "reservations.xlsx"
+    on_share.backup_dir = tmp_path / "share-backups"
+    on_share.lock = FileLock(str(tmp_path / "share.lock"))
+    assert [u.name for u in on_share.list_users()] == ["alice"]
+
+    offline = tmp_path / "share-offline"
+    share_dir.rename(offline)
+    repo.upsert_user("bob", enabled=True, is_admin=False)
+    repo.replica.poll()
+    assert repo.replica.pending
+    assert repo.replica.pending_marker.exists()
+    assert sorted(u.name for u in repo.list_users()) == ["alice", "bob"]
+
+    offline.rename(share_dir)
+    repo.replica.poll()
+    assert not repo.replica.pending
+    assert sorted(u.name for u in on_share.list_users()) == ["alice", "bob"]
+
+    on_share.upsert_user("carol", enabled=True, is_admin=False)
+    repo.replica.poll()
+    assert sorted(u.name for u in repo.list_users()) == ["alice", "bob", "carol"]
+    repo.close()
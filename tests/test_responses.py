@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import gzip
+
+from app.responses import ENCODING_GZIP, ENCODING_IDENTITY, EncodedBodyCache, negotiate_encoding
+
+
+def test_accept_encoding_negotiation():
+    assert negotiate_encoding(None) == ENCODING_IDENTITY
+    assert negotiate_encoding("gzip, deflate") == ENCODING_GZIP
+    assert negotiate_encoding("gzip;q=0, deflate") == ENCODING_IDENTITY
+    assert negotiate_encoding("*;q=0.5") in {ENCODING_GZIP, "br"}
+
+
+def test_bodies_are_serialized_and_compressed_once_per_etag():
+    cache = EncodedBodyCache(max_entries=2, min_compress_bytes=16)
+    calls = []
+
+    def produce() -> bytes:
+        calls.append(1)
+        return b'[{"desk_id":"d1"}]' * 10
+
+    body, encoding = cache.render('"v1"', ENCODING_GZIP, produce)
+    assert encoding == ENCODING_GZIP and gzip.decompress(body) == produce()
+    calls.clear()
+    assert cache.render('"v1"', ENCODING_GZIP, produce) == (body, ENCODING_GZIP)
+    assert cache.render('"v1"', ENCODING_IDENTITY, produce)[1] == ENCODING_IDENTITY
+    assert calls == []
+
+    assert cache.render('"tiny"', ENCODING_GZIP, lambda: b"[]") == (b"[]", ENCODING_IDENTITY)
+    cache.render('"v2"', ENCODING_IDENTITY, produce)
+    assert cache.get('"v1"', ENCODING_GZIP) is None
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import json
 from datetime import datetime, timedelta
 
 import pytest
 from fastapi import HTTPException
 from filelock import FileLock
 
+from app.archive import ReservationArchive
+from app.journal import Journal
+from app.models import ReservationBatchItem
 from app.repository import ExcelRepository
 from app.services import ReservationService
+from app.shared_state import SharedCounters
+from app.sqlite_repository import SqliteRepository
+from app.store import VersionConflictError
 
 
 def _next_weekday(target_weekday: int):
@@ -18,12 +26,18 @@ def _next_weekday(target_weekday: int):
     return today + timedelta(days=delta)
 
 
-@pytest.fixture()
-def service(tmp_path):
-    repo = ExcelRepository()
-    repo.data_file = tmp_path / "reservations.xlsx"
-    repo.backup_dir = tmp_path / "backups"
-    repo.lock = FileLock(str(tmp_path / "reservations.lock"))
+@pytest.fixture(params=["excel", "excel-journal", "sqlite"])
+def service(request, tmp_path):
+    if request.param == "sqlite":
+        repo = SqliteRepository()
+        repo.db_file = tmp_path / "reservations.db"
+    else:
+        repo = ExcelRepository()
+        repo.data_file = tmp_path / "reservations.xlsx"
+        repo.backup_dir = tmp_path / "backups"
+        repo.lock = FileLock(str(tmp_path / "reservations.lock"))
+        if request.param == "excel-journal":
+            repo.journal = Journal(tmp_path / "reservations.journal")
     repo.init_storage()
     svc = ReservationService(repo=repo)
 
@@ -121,7 +135,350 @@ def test_backup_created_on_write(service):
     d = _next_workday()
     svc = service["service"]
     repo = service["repo"]
+    if not isinstance(repo, ExcelRepository) or repo.journal is not None:
+        pytest.skip("backups are taken when the workbook itself is rewritten")
 
     svc.create_reservation(service["alice"], service["desk1"].desk_id, d, "AM")
-    backups = list(repo.backup_dir.glob("*.xlsx"))
+    repo.backups.flush()
+    backups = repo.backups.list_backups()
     assert backups
+
+
+def test_occupancy_grid_tracks_writes(service):
+    d = _next_workday()
+    svc = service["service"]
+    repo = service["repo"]
+    owner = service["owner"]
+
+    def snapshot():
+        return sorted((r.date, r.slot, r.desk_id, r.user_id, r.auto) for r in svc.list_effective_reservations())
+
+    assert (d, "AM", "d2", owner.user_id, True) in snapshot()
+    grid = svc._grid
+
+    svc.upsert_absence(owner, "d2", d, "AM", released=True)
+    created = svc.create_reservation(service["alice"], "d2", d, "AM")
+    booked = svc.create_reservation(service["bob"], "d1", d, "AM")
+    svc.update_reservation(service["alice"], created[0].reservation_id, "d1", d, "PM")
+    svc.cancel_reservation(service["bob"], booked[0].reservation_id)
+
+    patched = snapshot()
+    assert svc._grid is grid
+    svc._grid = None
+    assert patched == snapshot()
+    assert repo.data_version() == grid.version
+
+
+def test_grouped_writes_all_reach_the_grid(service):
+    import threading
+
+    d = _next_workday()
+    svc = service["service"]
+    repo = service["repo"]
+    svc.list_effective_reservations()
+    if hasattr(repo, "writer"):
+        repo.writer.window_seconds = 0.2
+    before = repo.data_version()
+
+    threads = [
+        threading.Thread(target=svc.create_reservation, args=(service[name], "d1", d, slot))
+        for name, slot in (("alice", "AM"), ("bob", "PM"))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert repo.data_version() == before + 2
+    booked = {r.slot for r in svc.list_effective_reservations() if r.date == d and r.desk_id == "d1"}
+    assert booked == {"AM", "PM"}
+
+
+def test_external_workbook_edit_reaches_effective_views(service, tmp_path):
+    import shutil
+
+    from openpyxl import load_workbook
+
+    from app.constants import RESERVATIONS_HEADERS
+
+    repo = service["repo"]
+    if not isinstance(repo, ExcelRepository):
+        pytest.skip("only the workbook can be edited outside the app")
+    svc = service["service"]
+    d = _next_workday()
+
+    def booked():
+        return [r.reservation_id for r in svc.bootstrap(service["alice"]).reservations if not r.auto]
+
+    assert booked() == []
+    saved = shutil.copy2(repo.data_file, tmp_path / "saved.xlsx")
+    state = repo.data_state()
+
+    stamp = datetime.utcnow().isoformat()
+    row = {
+        "reservation_id": "edited-by-hand",
+        "user_id": service["alice"].user_id,
+        "desk_id": "d1",
+        "date": d.isoformat(),
+        "slot": "AM",
+        "created_at": stamp,
+        "updated_at": stamp,
+        "version": 1,
+    }
+    wb = load_workbook(repo.data_file)
+    wb["reservations"].append([row.get(header) for header in RESERVATIONS_HEADERS])
+    wb.save(repo.data_file)
+
+    edited = repo.data_state()
+    assert edited.revision == state.revision and edited.tag != state.tag
+    assert booked() == ["edited-by-hand"]
+
+    # Putting the older copy back keeps the revision but not the tag.
+    shutil.copy2(saved, repo.data_file)
+    restored = repo.data_state()
+    assert restored.revision == edited.revision and restored.tag != edited.tag
+    assert booked() == []
+
+
+def test_full_day_conflicts_reported_together(service):
+    d = _next_workday()
+    svc = service["service"]
+    alice = service["alice"]
+
+    svc.create_reservation(alice, "d1", d, "AM")
+    svc.upsert_absence(service["owner"], "d2", d, "AM", released=True)
+    with pytest.raises(HTTPException) as exc:
+        svc.create_reservation(alice, "d2", d, "FULL")
+    assert exc.value.status_code == 409
+    assert exc.value.detail == (
+        "AM: User already has a desk in this slot; PM: Named desk is not released by owner"
+    )
+
+    desk1 = service["repo"].get_desk("d1")
+    assert svc.find_conflicts(service["bob"].user_id, desk1, d, ["AM", "PM"]) == {"AM": ["Desk already reserved"]}
+
+
+def test_batch_is_atomic_and_persists_once(service):
+    d = _next_workday()
+    svc = service["service"]
+    repo = service["repo"]
+    alice = service["alice"]
+
+    before = repo.data_version()
+    created = svc.create_reservation(alice, "d1", d, "FULL")
+    assert len(created) == 2
+    assert repo.data_version() == before + 1
+
+    items = [
+        ReservationBatchItem(action="cancel", reservation_id=created[0].reservation_id),
+        ReservationBatchItem(action="create", desk_id="d1", date=d, slot="AM"),
+        ReservationBatchItem(action="create", desk_id="d1", date=d, slot="PM"),
+    ]
+    with pytest.raises(HTTPException) as exc:
+        svc.apply_batch(alice, items)
+    assert exc.value.status_code == 409
+    assert {r.reservation_id for r in repo.list_reservations()} == {r.reservation_id for r in created}
+
+    results = svc.apply_batch(alice, items[:2])
+    assert [r.slot for r in results] == ["AM"]
+    assert {r.slot for r in repo.list_reservations()} == {"AM", "PM"}
+    assert repo.data_version() == before + 2
+
+
+def test_stale_version_rejected(service):
+    d = _next_workday()
+    svc = service["service"]
+    alice = service["alice"]
+
+    created = svc.create_reservation(alice, "d1", d, "AM")[0]
+    assert created.version == 1
+    moved = svc.update_reservation(alice, created.reservation_id, None, None, "PM", expected_version=1)
+    assert moved.version == 2
+    assert service["repo"].get_reservation(created.reservation_id).version == 2
+
+    with pytest.raises(HTTPException) as exc:
+        svc.update_reservation(alice, created.reservation_id, None, None, "AM", expected_version=1)
+    assert exc.value.status_code == 412
+    with pytest.raises(VersionConflictError):
+        service["repo"].update_reservation(created.reservation_id, alice.user_id, "d1", d, "AM", expected_version=1)
+
+
+def test_batch_version_conflict_matches_single_item_status(service, monkeypatch):
+    d = _next_workday()
+    svc = service["service"]
+    repo = service["repo"]
+    alice = service["alice"]
+    created = svc.create_reservation(alice, "d1", d, "AM")[0]
+    original = repo.apply_reservation_ops
+
+    def edited_meanwhile(ops):
+        # Another client moves the reservation between planning and commit.
+        repo.update_reservation(created.reservation_id, alice.user_id, "d1", d, "PM")
+        return original(ops)
+
+    monkeypatch.setattr(repo, "apply_reservation_ops", edited_meanwhile)
+    for version, expected_status in ((None, 409), (2, 412)):
+        item = ReservationBatchItem(action="update", reservation_id=created.reservation_id, slot="AM", version=version)
+        with pytest.raises(HTTPException) as exc:
+            svc.apply_batch(alice, [item])
+        assert exc.value.status_code == expected_status
+
+
+def test_bootstrap_returns_consistent_views(service):
+    svc = service["service"]
+    data = svc.bootstrap(service["owner"])
+    assert data.me.user_id == service["owner"].user_id
+    assert {u.user_id for u in data.users} == {service[key].user_id for key in ("owner", "alice", "bob")}
+    assert {d.desk_id for d in data.desks} == {"d1", "d2"}
+    assert [r.reservation_id for r in data.reservations] == [
+        r.reservation_id for r in svc.list_effective_reservations()
+    ]
+
+
+def test_bootstrap_reads_one_snapshot_while_writes_land(service, monkeypatch):
+    import threading
+
+    d = _next_workday()
+    svc = service["service"]
+    repo = service["repo"]
+    alice = service["alice"]
+    version = repo.data_version()
+    list_desks = svc.list_desks
+    writer = threading.Thread(target=repo.create_reservation, args=(alice.user_id, "d1", d, "AM"))
+
+    def desks_then_write():
+        desks = list_desks()
+        writer.start()
+        # Lets the write finish on backends that don't make it wait for us.
+        writer.join(timeout=1)
+        return desks
+
+    monkeypatch.setattr(svc, "list_desks", desks_then_write)
+    data = svc.bootstrap(alice)
+    writer.join()
+
+    assert data.version == version
+    assert not [r for r in data.reservations if r.desk_id == "d1"]
+    monkeypatch.undo()
+    assert [r.desk_id for r in svc.bootstrap(alice).reservations if r.user_id == alice.user_id] == ["d1"]
+
+
+def test_writes_publish_slot_deltas(service):
+    d = _next_workday()
+    svc = service["service"]
+    svc.list_effective_reservations()
+
+    async def scenario():
+        with svc.events.subscribe() as subscription:
+            svc.upsert_absence(service["owner"], "d2", d, "AM", released=True)
+            svc.create_reservation(service["alice"], "d2", d, "AM")
+            return [json.loads(await subscription.get()) for _ in range(2)]
+
+    released, booked = asyncio.run(scenario())
+    assert released["slots"] == [{"date": d.isoformat(), "slot": "AM", "desk_id": "d2", "reservation": None}]
+    assert booked["version"] == released["version"] + 1
+    assert booked["slots"][0]["reservation"]["user_id"] == service["alice"].user_id
+
+
+def test_principal_cache_invalidated_by_user_upsert(service):
+    svc = service["service"]
+    repo = service["repo"]
+    alice = service["alice"]
+    admin = repo.upsert_user("admin@ide-tech.com", enabled=True, is_admin=True)
+
+    assert svc.get_principal(alice.user_id) == alice
+    assert svc.cached_principal(alice.user_id) == alice
+
+    svc.admin_upsert_user(admin, name=alice.name, enabled=False, is_admin=False)
+    assert svc.cached_principal(alice.user_id) is None
+    with pytest.raises(HTTPException) as exc:
+        svc.get_principal(alice.user_id)
+    assert exc.value.status_code == 403
+
+
+def _second_worker(repo):
+    # A separate repository on the same storage, as another uvicorn worker has.
+    if isinstance(repo, SqliteRepository):
+        other = SqliteRepository()
+        other.db_file = repo.db_file
+        return other
+    other = ExcelRepository()
+    other.data_file = repo.data_file
+    other.backup_dir = repo.backup_dir
+    other.lock = FileLock(repo.lock.lock_file)
+    if repo.journal is not None:
+        other.journal = Journal(repo.journal.path)
+    return other
+
+
+def test_shared_counters_invalidate_other_workers(service, tmp_path):
+    repo = service["repo"]
+    other = _second_worker(repo)
+    alice = service["alice"]
+    admin = repo.upsert_user("admin@ide-tech.com", enabled=True, is_admin=True)
+    first = ReservationService(repo=repo, counters=SharedCounters(tmp_path / "shared.counters"))
+    second = ReservationService(repo=other, counters=SharedCounters(tmp_path / "shared.counters"))
+    second.sync_external_changes()
+
+    assert second.get_principal(alice.user_id) == alice
+    first.admin_upsert_user(admin, name=alice.name, enabled=False, is_admin=False)
+    assert second.cached_principal(alice.user_id) is None
+
+    first.create_reservation(service["bob"], "d1", _next_workday(), "AM")
+    assert first.sync_external_changes() is False
+    assert second.sync_external_changes() is True
+    assert second.sync_external_changes() is False
+
+    # Tags feed the ETags and the body cache: whichever worker answers, an
+    # equal tag has to mean an equal body, and the revision has to agree.
+    bodies: dict[str, str] = {}
+
+    def observe() -> None:
+        for worker in (first, second):
+            state = worker.repo.data_state()
+            # Auto reservations are stamped at read time; compare the rest.
+            reservations = worker.list_effective_reservations()
+            body = json.dumps(
+                [
+                    [user.model_dump(mode="json") for user in worker.list_users()],
+                    [r.model_dump(mode="json", exclude={"created_at", "updated_at"}) for r in reservations],
+                ],
+                sort_keys=True,
+            )
+            assert bodies.setdefault(state.tag, body) == body
+        assert first.repo.data_state() == second.repo.data_state()
+
+    observe()
+    owner = service["owner"]
+    second.upsert_absence(owner, "d2", _next_workday(), "AM", released=True)
+    observe()
+    first.create_reservation(service["bob"], "d1", _next_workday(), "PM")
+    observe()
+    second.admin_upsert_user(admin, name=alice.name, enabled=True, is_admin=False)
+    observe()
+    assert len(bodies) == 4
+    other.close()
+
+
+def test_past_partitions_move_to_archive(service, tmp_path):
+    from datetime import date
+
+    svc = service["service"]
+    repo = service["repo"]
+    repo.archive = ReservationArchive(tmp_path / "archive")
+    admin = repo.upsert_user("admin@ide-tech.com", enabled=True, is_admin=True)
+    old = repo.create_reservation(service["alice"].user_id, "d1", date(2020, 1, 6), "AM")
+    repo.upsert_absence(service["owner"].user_id, "d2", date(2020, 2, 3), "PM", released=True)
+    [upcoming] = svc.create_reservation(service["bob"], "d1", _next_workday(), "AM")
+
+    assert svc.archive_past() == 2
+    assert svc.archive_past() == 0
+    assert repo.archive.partitions("reservations") == ["2020-01"]
+    assert [r.reservation_id for r in repo.list_reservations()] == [upcoming.reservation_id]
+    assert repo.list_absences() == []
+
+    history = svc.admin_reservation_history(admin, date(2020, 1, 1), date(2020, 1, 31))
+    assert [(r.reservation_id, r.date) for r in history] == [(old.reservation_id, old.date)]
+    with pytest.raises(HTTPException) as exc:
+        svc.admin_reservation_history(service["alice"], date(2020, 1, 1), date(2020, 1, 31))
+    assert exc.value.status_code == 403
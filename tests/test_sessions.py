@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from app.sessions import MemorySessionStore, SqliteSessionStore, TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_sweeps_expired_and_bounds_size():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(max_size=3, clock=clock)
+    cache.set("a", 1, ttl_seconds=10)
+    cache.set("b", 2, ttl_seconds=100)
+    clock.now += 20
+    cache.set("c", 3, ttl_seconds=100)
+    assert len(cache) == 2  # "a" swept by the write, not by a lookup
+
+    cache.set("d", 4, ttl_seconds=50)
+    cache.set("e", 5, ttl_seconds=200)
+    assert len(cache) == 3
+    assert cache.get("d") is None  # closest to expiry, evicted first
+    assert [cache.get(key) for key in ("b", "c", "e")] == [2, 3, 5]
+
+
+def test_memory_sessions_expire():
+    clock = FakeClock()
+    store = MemorySessionStore(max_size=10, clock=clock)
+    token = store.create("u1", ttl_seconds=60)
+    assert store.get(token) == "u1"
+    clock.now += 61
+    assert store.get(token) is None
+
+
+def test_sqlite_sessions_survive_a_new_store(tmp_path):
+    first = SqliteSessionStore(tmp_path / "sessions.db")
+    token = first.create("u1", ttl_seconds=60)
+    expired = first.create("u2", ttl_seconds=-1)
+
+    second = SqliteSessionStore(tmp_path / "sessions.db")
+    assert second.get(token) == "u1"
+    assert second.get(expired) is None
+    second.delete(token)
+    assert first.get(token) is None